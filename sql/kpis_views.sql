@@ -5,7 +5,20 @@
 -- Drop existing views to avoid data type conflicts
 DROP VIEW IF EXISTS analytics.kpi_annual_growth CASCADE;
 DROP VIEW IF EXISTS analytics.kpi_seasonal_analysis CASCADE;
-DROP VIEW IF EXISTS analytics.kpi_temporal_trends CASCADE;
+
+-- As views 15, 17, 18 e 19 são materializadas (o refresh é feito em run_kpis.py e
+-- DatabaseLoader.post_load) e recriadas a cada execução deste arquivo, como as demais.
+-- Bancos antigos as têm como views comuns, removidas aqui antes de recriá-las.
+DO $$
+DECLARE
+    view_name TEXT;
+BEGIN
+    FOREACH view_name IN ARRAY ARRAY['kpi_top_performers', 'kpi_market_penetration', 'kpi_temporal_trends'] LOOP
+        IF EXISTS (SELECT 1 FROM pg_views WHERE schemaname = 'analytics' AND viewname = view_name) THEN
+            EXECUTE format('DROP VIEW analytics.%I CASCADE', view_name);
+        END IF;
+    END LOOP;
+END $$;
 
 -- 1. VIEW: Resumo Geral de Vendas por Ano
 -- =====================================================
@@ -340,9 +353,10 @@ FROM bmw_sales
 GROUP BY region, year
 ORDER BY region, year;
 
--- 15. VIEW: Top Performers por Múltiplas Métricas
+-- 15. MATERIALIZED VIEW: Top Performers por Múltiplas Métricas
 -- =====================================================
-CREATE OR REPLACE VIEW analytics.kpi_top_performers AS
+DROP MATERIALIZED VIEW IF EXISTS analytics.kpi_top_performers CASCADE;
+CREATE MATERIALIZED VIEW analytics.kpi_top_performers AS
 WITH model_metrics AS (
     SELECT 
         model,
@@ -380,6 +394,10 @@ SELECT
 FROM ranked_models
 ORDER BY composite_score;
 
+-- Índice único exigido por REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX ux_kpi_top_performers_model
+    ON analytics.kpi_top_performers (model);
+
 -- 16. VIEW: Análise de Correlação Preço-Volume
 -- =====================================================
 CREATE OR REPLACE VIEW analytics.kpi_price_volume_correlation AS
@@ -405,9 +423,10 @@ GROUP BY model, region
 HAVING COUNT(*) > 1  -- Precisa de pelo menos 2 pontos para correlação
 ORDER BY ABS(CORR(price_usd, sales_volume)) DESC;
 
--- 17. VIEW: Market Penetration por Região
+-- 17. MATERIALIZED VIEW: Market Penetration por Região
 -- =====================================================
-CREATE OR REPLACE VIEW analytics.kpi_market_penetration AS
+DROP MATERIALIZED VIEW IF EXISTS analytics.kpi_market_penetration CASCADE;
+CREATE MATERIALIZED VIEW analytics.kpi_market_penetration AS
 SELECT 
     region,
     COUNT(DISTINCT model) as models_available,
@@ -428,9 +447,13 @@ FROM bmw_sales
 GROUP BY region
 ORDER BY revenue_penetration_pct DESC;
 
--- 18. VIEW: Análise de Tendências Temporais
+CREATE UNIQUE INDEX ux_kpi_market_penetration_region
+    ON analytics.kpi_market_penetration (region);
+
+-- 18. MATERIALIZED VIEW: Análise de Tendências Temporais
 -- =====================================================
-CREATE OR REPLACE VIEW analytics.kpi_temporal_trends AS
+DROP MATERIALIZED VIEW IF EXISTS analytics.kpi_temporal_trends CASCADE;
+CREATE MATERIALIZED VIEW analytics.kpi_temporal_trends AS
 SELECT 
     year,
     COUNT(*) as total_records,
@@ -463,6 +486,32 @@ FROM bmw_sales
 GROUP BY year
 ORDER BY year;
 
+CREATE UNIQUE INDEX ux_kpi_temporal_trends_year
+    ON analytics.kpi_temporal_trends (year);
+
+-- 19. MATERIALIZED VIEW: Cor Mais Popular por Região
+-- =====================================================
+-- ROW_NUMBER (desempate pela cor) garante uma linha por região para o índice único
+DROP MATERIALIZED VIEW IF EXISTS analytics.kpi_popular_color_by_region CASCADE;
+CREATE MATERIALIZED VIEW analytics.kpi_popular_color_by_region AS
+SELECT region, color, total_units_sold, market_share_units_pct
+FROM (
+    SELECT 
+        region,
+        color,
+        SUM(sales_volume) as total_units_sold,
+        ROUND((SUM(sales_volume) * 100.0 / SUM(SUM(sales_volume)) OVER (PARTITION BY region))::numeric, 2) as market_share_units_pct,
+        ROW_NUMBER() OVER (PARTITION BY region ORDER BY SUM(sales_volume) DESC, color) as rn
+    FROM bmw_sales
+    WHERE color IS NOT NULL AND color != 'Unknown'
+    GROUP BY region, color
+) ranked
+WHERE rn = 1
+ORDER BY total_units_sold DESC;
+
+CREATE UNIQUE INDEX ux_kpi_popular_color_by_region_region
+    ON analytics.kpi_popular_color_by_region (region);
+
 -- =====================================================
 -- GRANTS E PERMISSÕES
 -- =====================================================
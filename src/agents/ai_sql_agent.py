@@ -90,7 +90,11 @@ class AISQLAgent:
                 SELECT table_name as view_name
                 FROM information_schema.views
                 WHERE table_schema = 'analytics'
-                ORDER BY table_name
+                UNION ALL
+                SELECT matviewname
+                FROM pg_matviews
+                WHERE schemaname = 'analytics'
+                ORDER BY view_name
             """)
             
             views = cursor.fetchall()
@@ -1,10 +1,14 @@
 """
 Natural Language SQL Agent - Versão Melhorada com Padrões de Reconhecimento Aprimorados
 """
+import os
+import threading
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 import json
 import re
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional, Tuple
 import logging
 from datetime import datetime
@@ -13,20 +17,71 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+def get_db_config() -> Dict[str, Any]:
+    """Database connection settings from the environment"""
+    return {
+        'host': os.getenv('POSTGRES_HOST', 'localhost'),
+        'port': int(os.getenv('POSTGRES_PORT', '5433')),
+        'database': os.getenv('POSTGRES_DB', 'ai_data_engineering'),
+        'user': os.getenv('POSTGRES_USER', 'postgres'),
+        'password': os.getenv('POSTGRES_PASSWORD', 'postgres123'),
+        'client_encoding': 'UTF8',
+        'options': '-c client_encoding=UTF8'
+    }
+
+# Seconds a query waits for a free pooled connection before giving up
+POOL_TIMEOUT = 30
+
+class BlockingConnectionPool(ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool that waits for a free connection
+    
+    ThreadedConnectionPool raises PoolError as soon as maxconn connections are
+    checked out; here getconn blocks (up to timeout seconds) until one is returned.
+    Keyed connections are not supported.
+    """
+    
+    def __init__(self, minconn: int, maxconn: int, *args, timeout: float = POOL_TIMEOUT, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+    
+    def getconn(self, key=None):
+        """Check a connection out, waiting while every connection is in use"""
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolError(f"no free connection in the pool after {self._timeout}s")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def putconn(self, conn=None, key=None, close=False):
+        """Return a connection and wake up one waiting getconn"""
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+def create_connection_pool(minconn: int = 1, maxconn: int = 5) -> ThreadedConnectionPool:
+    """Create a thread-safe pool of long-lived connections that agents can share"""
+    return BlockingConnectionPool(minconn, maxconn, **get_db_config())
+
 class NaturalLanguageSQLAgent:
-    def __init__(self):
-        """Initialize Natural Language SQL Agent"""
+    def __init__(self, pool: Optional[ThreadedConnectionPool] = None):
+        """
+        Initialize Natural Language SQL Agent
+        
+        Args:
+            pool: Optional shared connection pool; without one, every query
+                opens and closes its own connection
+        """
         # Database configuration
-        import os
-        self.DB_CONFIG = {
-            'host': os.getenv('POSTGRES_HOST', 'localhost'),
-            'port': int(os.getenv('POSTGRES_PORT', '5433')),
-            'database': os.getenv('POSTGRES_DB', 'ai_data_engineering'),
-            'user': os.getenv('POSTGRES_USER', 'postgres'),
-            'password': os.getenv('POSTGRES_PASSWORD', 'postgres123'),
-            'client_encoding': 'UTF8',
-            'options': '-c client_encoding=UTF8'
-        }
+        self.DB_CONFIG = get_db_config()
+        self.pool = pool
+        
+        # Schema is introspected once per agent; see get_database_schema
+        self._schema: Optional[Dict[str, Any]] = None
         
         # Enhanced query patterns with better recognition
         self.query_patterns = {
@@ -367,7 +422,7 @@ class NaturalLanguageSQLAgent:
             
             if matched_query:
                 # Execute predefined query
-                results = self._execute_query(matched_query['sql'])
+                results, columns = self._execute_query_with_columns(matched_query['sql'])
                 
                 response = {
                     'success': True,
@@ -377,16 +432,23 @@ class NaturalLanguageSQLAgent:
                     'explanation': matched_query['explanation'],
                     'confidence': matched_query['confidence'],
                     'results': results,
+                    'columns': columns,
                     'row_count': len(results),
                     'execution_time': (datetime.now() - start_time).total_seconds(),
                     'timestamp': datetime.now().isoformat()
                 }
                 
+                # Dashboard metrics by name, so callers don't scan the rows
+                if matched_query['type'] == 'dashboard':
+                    response['metrics'] = {
+                        row.get('metric_name'): row.get('metric_value') for row in results
+                    }
+                
             else:
                 # Try to generate custom query
                 custom_sql = self._generate_custom_query_improved(normalized_query)
                 if custom_sql:
-                    results = self._execute_query(custom_sql)
+                    results, columns = self._execute_query_with_columns(custom_sql)
                     response = {
                         'success': True,
                         'natural_language_query': query,
@@ -395,6 +457,7 @@ class NaturalLanguageSQLAgent:
                         'explanation': 'Query customizada gerada automaticamente',
                         'confidence': 0.7,
                         'results': results,
+                        'columns': columns,
                         'row_count': len(results),
                         'execution_time': (datetime.now() - start_time).total_seconds(),
                         'timestamp': datetime.now().isoformat()
@@ -675,20 +738,47 @@ class NaturalLanguageSQLAgent:
         
         return None
     
+    @contextmanager
+    def _connection(self):
+        """Check a connection out of the pool (or open one) for read-only queries"""
+        if self.pool is None:
+            conn = psycopg2.connect(**self.DB_CONFIG)
+            try:
+                conn.set_client_encoding('UTF8')
+                yield conn
+            finally:
+                conn.close()
+            return
+        
+        conn = self.pool.getconn()
+        broken = False
+        try:
+            # Reads only: don't leave pooled connections idle in a transaction
+            conn.autocommit = True
+            yield conn
+        except psycopg2.OperationalError:
+            broken = True
+            raise
+        finally:
+            self.pool.putconn(conn, close=broken or bool(conn.closed))
+    
     def _execute_query(self, sql_query: str) -> List[Dict[str, Any]]:
         """Execute SQL query and return results"""
+        return self._execute_query_with_columns(sql_query)[0]
+    
+    def _execute_query_with_columns(self, sql_query: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Execute SQL query and return its rows and result column names (in order)"""
         try:
-            conn = psycopg2.connect(**self.DB_CONFIG)
-            conn.set_client_encoding('UTF8')
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            cursor.execute(sql_query)
-            results = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                
+                cursor.execute(sql_query)
+                results = cursor.fetchall()
+                columns = [column.name for column in cursor.description or []]
+                
+                cursor.close()
             
-            return [dict(row) for row in results]
+            return [dict(row) for row in results], columns
             
         except Exception as e:
             logger.error(f"Error executing query: {e}")
@@ -748,37 +838,48 @@ class NaturalLanguageSQLAgent:
         }
     
 
-    def get_database_schema(self) -> Dict[str, Any]:
-        """Get database schema information"""
+    def get_database_schema(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get database schema information
+        
+        Args:
+            refresh: Re-read information_schema instead of returning the
+                schema cached on the first successful call
+        """
+        if self._schema is not None and not refresh:
+            return self._schema
+        
         try:
-            conn = psycopg2.connect(**self.DB_CONFIG)
-            conn.set_client_encoding('UTF8')
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            
-            # Get table information
-            cursor.execute("""
-                SELECT table_name, column_name, data_type, is_nullable
-                FROM information_schema.columns
-                WHERE table_schema = 'public' AND table_name = 'bmw_sales'
-                ORDER BY table_name, ordinal_position
-            """)
-            
-            columns = cursor.fetchall()
-            
-            # Get view information
-            cursor.execute("""
-                SELECT table_name as view_name
-                FROM information_schema.views
-                WHERE table_schema = 'analytics'
-                ORDER BY table_name
-            """)
-            
-            views = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                
+                # Get table information
+                cursor.execute("""
+                    SELECT table_name, column_name, data_type, is_nullable
+                    FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = 'bmw_sales'
+                    ORDER BY table_name, ordinal_position
+                """)
+                
+                columns = cursor.fetchall()
+                
+                # Get view information
+                cursor.execute("""
+                    SELECT table_name as view_name
+                    FROM information_schema.views
+                    WHERE table_schema = 'analytics'
+                    UNION ALL
+                    SELECT matviewname
+                    FROM pg_matviews
+                    WHERE schemaname = 'analytics'
+                    ORDER BY view_name
+                """)
+                
+                views = cursor.fetchall()
+                
+                cursor.close()
             
-            return {
+            self._schema = {
                 'tables': {
                     'bmw_sales': [dict(col) for col in columns]
                 },
@@ -787,6 +888,7 @@ class NaturalLanguageSQLAgent:
                 },
                 'available_queries': self.get_available_queries()
             }
+            return self._schema
             
         except Exception as e:
             logger.error(f"Error getting schema: {e}")
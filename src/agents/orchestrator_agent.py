@@ -108,7 +108,8 @@ class OrchestratorAgent:
                 
                 # Convert results to DataFrame
                 if sql_result['results']:
-                    df = pd.DataFrame(sql_result['results'])
+                    df = pd.DataFrame.from_records(sql_result['results'],
+                                                   columns=sql_result.get('columns'))
                     
                     # Generate visualization
                     viz_result = self.viz_agent.generate_chart(
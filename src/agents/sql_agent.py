@@ -280,19 +280,12 @@ class SQLAgent:
         
         return sql_query, explanation
     
-    def get_query_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent query history"""
+    def get_query_history(self, limit: int = 10, start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Get recent query history, optionally restricted to a date range"""
         try:
-            # This would query the QueryLog table
-            query = f"""
-            SELECT user_query, sql_query, response, execution_time, success, created_at
-            FROM query_logs
-            ORDER BY created_at DESC
-            LIMIT {limit}
-            """
-            
-            results = self.db_loader.execute_query(query)
-            return results
+            # Limit and date range are bound parameters applied by Postgres
+            return self.db_loader.get_query_history(limit=limit, start_date=start_date, end_date=end_date)
             
         except Exception as e:
             logger.error(f"Error getting query history: {e}")
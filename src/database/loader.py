@@ -2,37 +2,261 @@
 Database loader for BMW sales data
 """
 import os
+import io
 import sys
+import csv
+import atexit
+import itertools
+import uuid
+import threading
+import weakref
 import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_batch, RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from sqlalchemy import create_engine, insert, table, column
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from concurrent.futures import ThreadPoolExecutor
+import math
+import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, List, Any, Optional
+from collections import deque
+from typing import Dict, Iterable, List, Any, Optional
 from datetime import datetime
 
+# psycopg 3 is optional; when present, log writes are flushed in pipeline mode
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from config.database import DATABASE_CONFIG
+from config.database import DATABASE_CONFIG, DATABASE_URL, engine
+from database.models import BMWSales, QueryLog
 
 logger = logging.getLogger(__name__)
 
+# Insert column order shared by the COPY and INSERT writers
+BMW_SALES_COLUMNS = [
+    'model', 'year', 'region', 'color', 'fuel_type', 'transmission',
+    'engine_size_l', 'mileage_km', 'price_usd', 'sales_volume'
+]
+
+# Rows per batch handed to a load worker (each batch is sent in one round-trip),
+# and the number of parallel workers
+LOAD_BATCH_SIZE = 10000
+MAX_LOAD_WORKERS = 8
+
+# Bulk loads are reproducible from the source files, so their commits don't wait
+# for the WAL flush (a crash can lose the last load, never corrupt the table)
+ASYNC_COMMIT_SQL = "SET LOCAL synchronous_commit = OFF;"
+
+# Tables reported by get_database_stats
+STATS_TABLES = ['bmw_sales', 'data_sources', 'query_logs']
+
+# Buffered log writes are flushed after this many entries or seconds
+LOG_FLUSH_SIZE = 20
+LOG_FLUSH_INTERVAL = 1.0
+
+# Entries kept for retry while the log writes keep failing; the oldest are dropped beyond this
+LOG_BUFFER_MAX = 1000
+
+QUERY_LOG_INSERT_SQL = """
+INSERT INTO query_logs (user_query, sql_query, response, execution_time, success, error_message)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+DATA_SOURCE_INSERT_SQL = """
+INSERT INTO data_sources (name, source_type, record_count)
+VALUES (%s, %s, %s)
+"""
+
+def is_psycopg3_backend() -> bool:
+    """Check whether the psycopg 3 driver is available"""
+    return psycopg is not None
+
+# Numeric bmw_sales columns and the Python type each is coerced to
+BMW_NUMERIC_COLUMNS = {
+    'year': 'int64',
+    'engine_size_l': 'float64',
+    'mileage_km': 'int64',
+    'price_usd': 'float64',
+    'sales_volume': 'int64'
+}
+
+# Text bmw_sales columns and their VARCHAR lengths
+BMW_TEXT_COLUMNS = {
+    'model': 100,
+    'region': 100,
+    'color': 50,
+    'fuel_type': 50,
+    'transmission': 50
+}
+
+def _coerce_column(series: pd.Series, target_dtype: str) -> pd.Series:
+    """
+    Coerce a column to a numeric type in one vectorized pass
+    
+    Args:
+        series: Raw column values
+        target_dtype: numpy dtype to cast to ('int64' or 'float64')
+        
+    Returns:
+        Object Series of Python scalars, with None where the value is missing
+    """
+    numeric = pd.to_numeric(series, errors='coerce')
+    missing = numeric.isna()
+    coerced = numeric.fillna(0).astype(target_dtype).astype(object)
+    return coerced.where(~missing, None)
+
+class _CSVTextStream:
+    """File-like object that pulls CSV text on demand for COPY ... FROM STDIN"""
+    
+    def __init__(self, pieces: Iterable[str]):
+        self._pieces = iter(pieces)
+        self._buffer = ''
+    
+    def read(self, size: int = -1) -> str:
+        """Return up to size characters, rendering more pieces on demand"""
+        if size < 0:
+            data, self._buffer = self._buffer + ''.join(self._pieces), ''
+            return data
+        
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while length < size:
+            piece = next(self._pieces, None)
+            if piece is None:
+                break
+            parts.append(piece)
+            length += len(piece)
+        
+        data = ''.join(parts)
+        chunk, self._buffer = data[:size], data[size:]
+        return chunk
+
+def _csv_row_pieces(rows: Iterable, rows_per_piece: int = 1000):
+    """Render rows to CSV text a block of rows at a time"""
+    rows = iter(rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    while True:
+        block = list(itertools.islice(rows, rows_per_piece))
+        if not block:
+            return
+        writer.writerows(block)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+class _CSVRowStream(_CSVTextStream):
+    """CSV text stream rendered lazily from row sequences"""
+    
+    def __init__(self, rows: Iterable):
+        super().__init__(_csv_row_pieces(rows))
+
+def _psql_copy(table, conn, keys, data_iter):
+    """
+    pandas to_sql insertion method that writes each chunk with COPY
+    
+    Args:
+        table: pandas SQLTable being written
+        conn: SQLAlchemy connection
+        keys: Column names
+        data_iter: Iterable of row tuples
+    """
+    dbapi_conn = conn.connection
+    
+    with dbapi_conn.cursor() as cursor:
+        table_name = (sql.Identifier(table.schema, table.name) if table.schema
+                      else sql.Identifier(table.name))
+        copy_sql = sql.SQL("COPY {} ({}) FROM STDIN WITH CSV").format(
+            table_name, sql.SQL(', ').join(map(sql.Identifier, keys))
+        )
+        cursor.copy_expert(copy_sql.as_string(cursor), _CSVRowStream(data_iter))
+
+# Loaders with buffered log writes; a weak set so exit handling doesn't keep them alive
+_active_loaders = weakref.WeakSet()
+
+@atexit.register
+def _flush_active_loaders():
+    """Flush the log buffers of every live loader at interpreter exit"""
+    for loader in list(_active_loaders):
+        loader.flush_logs()
+
+def _flush_loader_ref(loader_ref):
+    """Timer callback: flush a loader's logs if it is still alive"""
+    loader = loader_ref()
+    if loader is not None:
+        loader.flush_logs()
+
 class DatabaseLoader:
     def __init__(self):
         """Initialize database loader"""
         self.config = DATABASE_CONFIG
         self.connection = None
         
+        # Pool of independent connections used by parallel load workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._bulk_engine = None
+        
+        # Column information per table; cleared whenever create_tables rebuilds the schema
+        self._schema_cache: Dict[str, tuple] = {}
+        
+        # Pending (query_text, params) log writes, the dedicated connection used to
+        # flush them and the timer that flushes a partial buffer after LOG_FLUSH_INTERVAL
+        self._log_buffer = deque()
+        self._log_lock = threading.RLock()
+        self._log_connection = None
+        self._flush_timer = None
+        _active_loaders.add(self)
+        
     def get_connection(self):
         """Get database connection"""
         if not self.connection:
             self.connection = psycopg2.connect(**self.config)
         return self.connection
     
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Get the connection pool used for parallel loads, creating it on first use"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(1, MAX_LOAD_WORKERS, **self.config)
+            return self._pool
+    
+    def _get_bulk_engine(self):
+        """Get the SQLAlchemy engine used for multi-row VALUES inserts"""
+        with self._pool_lock:
+            if self._bulk_engine is None:
+                self._bulk_engine = create_engine(
+                    DATABASE_URL,
+                    executemany_mode='values_plus_batch',
+                    insertmanyvalues_page_size=LOAD_BATCH_SIZE,
+                    pool_size=MAX_LOAD_WORKERS
+                )
+            return self._bulk_engine
+    
     def close_connection(self):
         """Close database connection"""
+        self.flush_logs()
+        if self._log_connection is not None:
+            self._log_connection.close()
+            self._log_connection = None
         if self.connection:
             self.connection.close()
             self.connection = None
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+            if self._bulk_engine is not None:
+                self._bulk_engine.dispose()
+                self._bulk_engine = None
     
     def create_tables(self) -> bool:
         """Create BMW sales table"""
@@ -51,7 +275,7 @@ class DatabaseLoader:
             CREATE TABLE bmw_sales (
                 id SERIAL PRIMARY KEY,
                 model VARCHAR(100),
-                year INTEGER,
+                year SMALLINT,
                 region VARCHAR(100),
                 color VARCHAR(50),
                 fuel_type VARCHAR(50),
@@ -65,6 +289,35 @@ class DatabaseLoader:
             """
             
             cursor.execute(create_table_sql)
+            self._schema_cache.clear()
+            
+            # Bookkeeping tables are kept across reloads
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS data_sources (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(255),
+                source_type VARCHAR(50),
+                record_count INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """)
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS query_logs (
+                id SERIAL PRIMARY KEY,
+                user_query TEXT,
+                sql_query TEXT,
+                response TEXT,
+                execution_time FLOAT,
+                success BOOLEAN,
+                error_message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """)
+            for index in QueryLog.__table__.indexes:
+                cursor.execute(str(
+                    CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect())
+                ))
+            
             conn.commit()
             logger.info("BMW sales table created successfully")
             
@@ -75,8 +328,78 @@ class DatabaseLoader:
             logger.error(f"Error creating tables: {e}")
             return False
     
+    def pre_load(self) -> bool:
+        """Drop secondary bmw_sales indexes so the bulk load skips index maintenance"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            # Every index except those backing constraints (primary key)
+            cursor.execute("""
+                SELECT indexname
+                FROM pg_indexes
+                WHERE schemaname = 'public' AND tablename = 'bmw_sales'
+                AND indexname NOT IN (
+                    SELECT conname FROM pg_constraint
+                    WHERE conrelid = 'public.bmw_sales'::regclass
+                );
+            """)
+            index_names = [row[0] for row in cursor.fetchall()]
+            
+            for index_name in index_names:
+                cursor.execute(
+                    sql.SQL("DROP INDEX IF EXISTS {};").format(sql.Identifier(index_name))
+                )
+            conn.commit()
+            
+            logger.info(f"Dropped {len(index_names)} bmw_sales indexes before load")
+            cursor.close()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error dropping indexes before load: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
+    def post_load(self) -> bool:
+        """Build secondary bmw_sales indexes and refresh KPI materialized views once the bulk load is done"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            # One bulk sort-build per index declared on the model instead of per-row tree inserts
+            indexes = BMWSales.__table__.indexes
+            for index in indexes:
+                cursor.execute(str(
+                    CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect())
+                ))
+            cursor.execute("ANALYZE bmw_sales;")
+            
+            # Materialized KPI views (sql/kpis_views.sql) are stale after a load;
+            # CONCURRENTLY keeps them readable while they are recomputed
+            cursor.execute("SELECT schemaname, matviewname FROM pg_matviews WHERE schemaname = 'analytics';")
+            matviews = cursor.fetchall()
+            for schema_name, view_name in matviews:
+                cursor.execute(
+                    sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {}.{};").format(
+                        sql.Identifier(schema_name), sql.Identifier(view_name)
+                    )
+                )
+            conn.commit()
+            
+            logger.info(f"Created {len(indexes)} bmw_sales indexes and refreshed {len(matviews)} KPI views after load")
+            cursor.close()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error creating indexes after load: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
     def clear_existing_data(self) -> bool:
-        """Clear existing data from tables"""
+        """Clear existing data from tables (TRUNCATE: no per-row WAL or dead tuples)"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
@@ -90,68 +413,515 @@ class DatabaseLoader:
             
         except Exception as e:
             logger.error(f"Error clearing existing data: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
+    def _build_output_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Build the typed, truncated bmw_sales columns with column-wise coercion"""
+        out_df = pd.DataFrame(index=df.index)
+        for col in BMW_SALES_COLUMNS:
+            if col in BMW_NUMERIC_COLUMNS:
+                if col in df.columns:
+                    out_df[col] = _coerce_column(df[col], BMW_NUMERIC_COLUMNS[col]).to_numpy()
+                else:
+                    out_df[col] = None
+            else:
+                if col in df.columns:
+                    # Truncate to the VARCHAR length in one string kernel per column
+                    out_df[col] = df[col].astype(str).str.slice(0, BMW_TEXT_COLUMNS[col]).to_numpy()
+                else:
+                    out_df[col] = ''
+        
+        return out_df
+    
+    def _copy_bmw_batch(self, batch_df: pd.DataFrame, target: str) -> int:
+        """COPY one batch of rows into the target table on a pooled connection and commit it"""
+        # Rows are rendered by pandas' C CSV writer, not built as Python tuples
+        buffer = io.StringIO()
+        self._build_output_frame(batch_df).to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(ASYNC_COMMIT_SQL)
+            copy_sql = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT CSV)").format(
+                sql.Identifier(target), sql.SQL(', ').join(map(sql.Identifier, BMW_SALES_COLUMNS))
+            )
+            cursor.copy_expert(copy_sql.as_string(cursor), buffer)
+            conn.commit()
+            cursor.close()
+            return len(batch_df)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+    
+    def _insert_bmw_batch(self, batch_df: pd.DataFrame, target: str) -> int:
+        """Insert one batch of rows into the target table with a Core multi-row INSERT and commit it"""
+        records = self._build_output_frame(batch_df).to_dict(orient='records')
+        target_table = table(target, *(column(name) for name in BMW_SALES_COLUMNS))
+        with self._get_bulk_engine().begin() as conn:
+            conn.exec_driver_sql(ASYNC_COMMIT_SQL)
+            conn.execute(insert(target_table), records)
+        return len(records)
+    
+    def load_bmw_sales(self, df: pd.DataFrame, source_name: str, use_copy: bool = True) -> bool:
+        """
+        Load BMW sales data into database
+        
+        Batches are written concurrently, each on its own pooled connection,
+        into an unlogged staging table. The staged rows are then moved into
+        bmw_sales in a single transaction, so a failed batch leaves bmw_sales
+        untouched.
+        
+        Args:
+            df: Transformed BMW sales DataFrame
+            source_name: Label recorded in data_sources
+            use_copy: Write batches with COPY; if False, use multi-row INSERTs
+        """
+        staging = f"bmw_sales_staging_{uuid.uuid4().hex[:12]}"
+        columns = sql.SQL(', ').join(map(sql.Identifier, BMW_SALES_COLUMNS))
+        
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(sql.SQL("CREATE UNLOGGED TABLE {} AS SELECT {} FROM bmw_sales WITH NO DATA;").format(
+                sql.Identifier(staging), columns
+            ))
+            conn.commit()
+            
+            try:
+                # Split once up front into evenly sized batches; each worker builds its own records
+                n_batches = math.ceil(len(df) / LOAD_BATCH_SIZE)
+                splits = np.array_split(np.arange(len(df)), n_batches) if n_batches else []
+                batches = [df.iloc[positions[0]:positions[-1] + 1] for positions in splits]
+                
+                # Write batches into the staging table in parallel
+                write_batch = self._copy_bmw_batch if use_copy else self._insert_bmw_batch
+                loaded = 0
+                if batches:
+                    workers = min(MAX_LOAD_WORKERS, len(batches))
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        loaded = sum(executor.map(lambda batch: write_batch(batch, staging), batches))
+                
+                # Publish every staged row at once
+                cursor.execute(ASYNC_COMMIT_SQL)
+                cursor.execute(sql.SQL("INSERT INTO bmw_sales ({0}) SELECT {0} FROM {1};").format(
+                    columns, sql.Identifier(staging)
+                ))
+                cursor.execute(sql.SQL("DROP TABLE {};").format(sql.Identifier(staging)))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                cursor.execute(sql.SQL("DROP TABLE IF EXISTS {};").format(sql.Identifier(staging)))
+                conn.commit()
+                raise
+            
+            cursor.close()
+            logger.info(f"Successfully loaded {loaded} records from {source_name}")
+            
+            self._record_data_source(source_name, 'dataframe', loaded)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error loading BMW sales data: {e}")
+            if self.connection:
+                self.connection.rollback()
             return False
     
-    def load_bmw_sales(self, df: pd.DataFrame, source_name: str) -> bool:
-        """Load BMW sales data into database"""
+    def bulk_load_bmw_sales(self, dfs: Iterable[pd.DataFrame], source_name: str) -> int:
+        """
+        Load several transformed DataFrames with COPY in a single transaction
+        
+        Frames are copied one at a time and each is rendered to CSV in
+        LOAD_BATCH_SIZE slices as COPY reads it, so neither the frames nor
+        their CSV text are ever held in full.
+        
+        Args:
+            dfs: Transformed BMW sales DataFrames
+            source_name: Label recorded in data_sources
+            
+        Returns:
+            Number of rows loaded (0 if the load failed and was rolled back)
+        """
+        copy_sql = f"COPY bmw_sales ({', '.join(BMW_SALES_COLUMNS)}) FROM STDIN WITH (FORMAT CSV)"
+        
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
+            cursor.execute(ASYNC_COMMIT_SQL)
             
-            # Prepare data for insertion
-            records = []
-            for _, row in df.iterrows():
-                record = (
-                    str(row.get('model', '')),
-                    int(row.get('year', 0)) if pd.notna(row.get('year')) else None,
-                    str(row.get('region', '')),
-                    str(row.get('color', '')),
-                    str(row.get('fuel_type', '')),
-                    str(row.get('transmission', '')),
-                    float(row.get('engine_size_l', 0)) if pd.notna(row.get('engine_size_l')) else None,
-                    int(row.get('mileage_km', 0)) if pd.notna(row.get('mileage_km')) else None,
-                    float(row.get('price_usd', 0)) if pd.notna(row.get('price_usd')) else None,
-                    int(row.get('sales_volume', 0)) if pd.notna(row.get('sales_volume')) else None
+            loaded = 0
+            for df in dfs:
+                if df is None or df.empty:
+                    continue
+                # Rendered one slice at a time while COPY consumes it
+                pieces = (
+                    self._build_output_frame(df.iloc[start:start + LOAD_BATCH_SIZE])
+                    .to_csv(index=False, header=False)
+                    for start in range(0, len(df), LOAD_BATCH_SIZE)
                 )
-                records.append(record)
+                cursor.copy_expert(copy_sql, _CSVTextStream(pieces))
+                loaded += len(df)
             
-            # Insert data
-            insert_sql = """
-            INSERT INTO bmw_sales 
-            (model, year, region, color, fuel_type, transmission, engine_size_l, mileage_km, price_usd, sales_volume)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
+            conn.commit()
+            cursor.close()
+            
+            logger.info(f"Successfully bulk loaded {loaded} records from {source_name}")
+            self._record_data_source(source_name, 'dataframe', loaded)
+            return loaded
+            
+        except Exception as e:
+            logger.error(f"Error bulk loading BMW sales data: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return 0
+    
+    def load_csv_to_bmw(self, csv_path: str, source_name: str,
+                        column_map: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Load a CSV file straight into bmw_sales with COPY, without pandas
+        
+        Args:
+            csv_path: Path to the CSV file
+            source_name: Label used in log messages
+            column_map: Optional mapping of normalized CSV column names to bmw_sales columns
+            
+        Returns:
+            True if the load succeeded, False otherwise
+        """
+        column_map = column_map or {}
+        copy_sql = f"COPY bmw_sales ({', '.join(BMW_SALES_COLUMNS)}) FROM STDIN WITH (FORMAT CSV, HEADER {{header}})"
+        
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
             
-            cursor.executemany(insert_sql, records)
+            with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                
+                # Same normalization as DataProcessor.transform_bmw_data
+                normalized = [name.strip().lower().replace(' ', '_') for name in header]
+                normalized = [column_map.get(name, name) for name in normalized]
+                
+                if normalized == BMW_SALES_COLUMNS:
+                    # Columns already match the table: hand the file to COPY as-is
+                    f.seek(0)
+                    cursor.copy_expert(copy_sql.format(header='true'), f)
+                else:
+                    # Project/reorder columns row by row; absent columns load as NULL
+                    positions = [normalized.index(col) if col in normalized else None
+                                 for col in BMW_SALES_COLUMNS]
+                    rows = (
+                        [row[pos] if pos is not None and pos < len(row) else None
+                         for pos in positions]
+                        for row in reader
+                    )
+                    cursor.copy_expert(copy_sql.format(header='false'), _CSVRowStream(rows))
+            
+            row_count = cursor.rowcount
             conn.commit()
             
-            logger.info(f"Successfully loaded {len(records)} records from {source_name}")
+            logger.info(f"Successfully copied {row_count} records from {source_name}")
             cursor.close()
+            
+            self._record_data_source(source_name, 'csv', row_count)
             return True
             
         except Exception as e:
-            logger.error(f"Error loading BMW sales data: {e}")
+            logger.error(f"Error copying CSV {csv_path} into bmw_sales: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
+    def load_dataframe(self, df: pd.DataFrame, table: str = 'bmw_sales',
+                       chunksize: int = 50000) -> bool:
+        """
+        Append a DataFrame to a table via pandas to_sql backed by COPY
+        
+        The DataFrame columns must match the target table columns.
+        
+        Args:
+            df: DataFrame to write
+            table: Target table name
+            chunksize: Rows per COPY chunk
+            
+        Returns:
+            True if the load succeeded, False otherwise
+        """
+        try:
+            df.to_sql(table, engine, method=_psql_copy, if_exists='append',
+                      index=False, chunksize=chunksize)
+            logger.info(f"Successfully loaded {len(df)} records into {table}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading DataFrame into {table}: {e}")
             return False
     
+    def _record_data_source(self, name: str, source_type: str, record_count: int):
+        """Queue a data_sources row for a completed load"""
+        self._enqueue_log_write(DATA_SOURCE_INSERT_SQL, (name, source_type, record_count))
+    
+    def log_query(self, user_query: str, sql_query: Optional[str] = None,
+                  response: Optional[str] = None, execution_time: Optional[float] = None,
+                  success: bool = True, error_message: Optional[str] = None):
+        """
+        Queue a query_logs entry
+        
+        Entries are buffered and written in batches (see flush_logs), so
+        logging does not open a connection or wait on the server per call.
+        """
+        self._enqueue_log_write(
+            QUERY_LOG_INSERT_SQL,
+            (user_query, sql_query, response, execution_time, success, error_message)
+        )
+    
+    def _enqueue_log_write(self, query_text: str, params: tuple):
+        """Buffer a log write; flush when the buffer is full or LOG_FLUSH_INTERVAL has passed"""
+        with self._log_lock:
+            self._log_buffer.append((query_text, params))
+            flush_now = len(self._log_buffer) >= LOG_FLUSH_SIZE
+            if not flush_now and self._flush_timer is None:
+                # Holds only a weak reference, so a pending flush doesn't keep the loader alive
+                self._flush_timer = threading.Timer(
+                    LOG_FLUSH_INTERVAL, _flush_loader_ref, args=(weakref.ref(self),)
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        
+        if flush_now:
+            self.flush_logs()
+    
+    def _get_log_connection(self):
+        """Get the connection used only for log writes, so flushes never commit other work"""
+        if self._log_connection is None or self._log_connection.closed:
+            if is_psycopg3_backend():
+                conninfo = {('dbname' if k == 'database' else k): v for k, v in self.config.items()}
+                self._log_connection = psycopg.connect(**conninfo)
+            else:
+                self._log_connection = psycopg2.connect(**self.config)
+        return self._log_connection
+    
+    def flush_logs(self) -> bool:
+        """
+        Write all buffered log entries in a single transaction
+        
+        On failure the entries go back to the front of the buffer for the next flush.
+        """
+        with self._log_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._log_buffer:
+                return True
+            
+            entries = list(self._log_buffer)
+            self._log_buffer.clear()
+            
+            try:
+                conn = self._get_log_connection()
+                if is_psycopg3_backend():
+                    # Pipeline mode sends every statement without waiting for each reply
+                    with conn.pipeline():
+                        with conn.cursor() as cursor:
+                            for query_text, params in entries:
+                                cursor.execute(query_text, params)
+                else:
+                    cursor = conn.cursor()
+                    grouped = {}
+                    for query_text, params in entries:
+                        grouped.setdefault(query_text, []).append(params)
+                    for query_text, params_list in grouped.items():
+                        execute_batch(cursor, query_text, params_list, page_size=len(params_list))
+                    cursor.close()
+                conn.commit()
+                return True
+                
+            except Exception as e:
+                logger.error(f"Error flushing {len(entries)} log entries: {e}")
+                if self._log_connection is not None and not self._log_connection.closed:
+                    self._log_connection.rollback()
+                
+                self._log_buffer.extendleft(reversed(entries))
+                overflow = len(self._log_buffer) - LOG_BUFFER_MAX
+                if overflow > 0:
+                    for _ in range(overflow):
+                        self._log_buffer.popleft()
+                    logger.error(f"Dropped the {overflow} oldest unwritten log entries")
+                return False
+    
+    def get_query_history(self, limit: int = 10, start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Get recent query_logs entries, newest first
+        
+        Args:
+            limit: Maximum number of entries
+            start_date: Only entries created at or after this time
+            end_date: Only entries created at or before this time
+            
+        Returns:
+            List of query log dictionaries (empty on error)
+        """
+        # Buffered entries would otherwise be missing from the history
+        self.flush_logs()
+        
+        # The date range is filtered by Postgres, so only matching rows are sent back
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("created_at >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("created_at <= %s")
+            params.append(end_date)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(f"""
+                SELECT user_query, sql_query, response, execution_time, success, created_at
+                FROM query_logs
+                {where}
+                ORDER BY created_at DESC
+                LIMIT %s;
+            """, params)
+            history = [dict(row) for row in cursor.fetchall()]
+            cursor.close()
+            return history
+            
+        except Exception as e:
+            logger.error(f"Error getting query history: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return []
+    
     def get_database_stats(self) -> Dict[str, Any]:
-        """Get database statistics"""
+        """
+        Get database statistics
+        
+        Row counts come from pg_stat_user_tables.n_live_tup, which is an
+        estimate maintained by the statistics collector rather than an
+        exact COUNT(*) scan.
+        """
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            stats = {}
+            # Approximate row counts for all tables in one lookup
+            cursor.execute(
+                "SELECT relname, n_live_tup FROM pg_stat_user_tables WHERE relname = ANY(%s);",
+                (STATS_TABLES,)
+            )
+            row_counts = dict(cursor.fetchall())
             
-            # Get table row counts
-            cursor.execute("SELECT COUNT(*) FROM bmw_sales;")
-            stats['bmw_sales'] = {'row_count': cursor.fetchone()[0]}
+            # Column information for all tables in one query
+            cursor.execute("""
+                SELECT table_name, column_name, data_type, is_nullable, column_default
+                FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = ANY(%s)
+                ORDER BY table_name, ordinal_position;
+            """, (STATS_TABLES,))
+            
+            columns = {}
+            for table_name, column_name, data_type, is_nullable, column_default in cursor.fetchall():
+                columns.setdefault(table_name, []).append({
+                    'name': column_name,
+                    'type': data_type,
+                    'nullable': is_nullable == 'YES',
+                    'default': column_default
+                })
+            
+            stats = {}
+            for table_name in STATS_TABLES:
+                if table_name in columns:
+                    stats[table_name] = {
+                        'row_count': row_counts.get(table_name, 0),
+                        'columns': columns[table_name]
+                    }
             
             cursor.close()
             return stats
             
         except Exception as e:
             logger.error(f"Error getting database stats: {e}")
+            if self.connection:
+                self.connection.rollback()
             return {}
     
+    def _table_schema(self, table_name: str) -> tuple:
+        """Column information for a table (cached, the schema is quasi-static)"""
+        if table_name in self._schema_cache:
+            return self._schema_cache[table_name]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT column_name, data_type, is_nullable, column_default
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+            ORDER BY ordinal_position;
+        """, (table_name,))
+        rows = cursor.fetchall()
+        cursor.close()
+        
+        columns = tuple(
+            {
+                'name': column_name,
+                'type': data_type,
+                'nullable': is_nullable == 'YES',
+                'default': column_default
+            }
+            for column_name, data_type, is_nullable, column_default in rows
+        )
+        # Unknown tables are not cached, so they are seen once they are created
+        if columns:
+            self._schema_cache[table_name] = columns
+        return columns
+    
+    def get_table_info(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get column information and row count for a table
+        
+        Args:
+            table_name: Name of a table in the public schema
+            
+        Returns:
+            Dictionary with 'columns' and 'row_count', or None if the table is unknown
+        """
+        try:
+            columns = self._table_schema(table_name)
+            if not columns:
+                return None
+            
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            # Quote the table name as an identifier instead of interpolating it
+            cursor.execute(
+                sql.SQL("SELECT COUNT(*) FROM {};").format(sql.Identifier(table_name))
+            )
+            row_count = cursor.fetchone()[0]
+            cursor.close()
+            
+            return {
+                'columns': [dict(column) for column in columns],
+                'row_count': row_count
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting table info for {table_name}: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return None
+    
     def test_connection(self) -> bool:
         """Test database connection"""
         try:
@@ -0,0 +1,67 @@
+"""
+SQLAlchemy table definitions for the BMW sales database
+"""
+import os
+import sys
+
+from sqlalchemy import Column, Integer, SmallInteger, String, Numeric, Float, Boolean, Text, DateTime, Index, func, text
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from config.database import Base
+
+class BMWSales(Base):
+    """
+    BMW sales records loaded by the ETL pipeline
+    
+    Bulk writes go through Core (COPY or insert(BMWSales.__table__) with row
+    dicts); never build one BMWSales instance per loaded row.
+    """
+    __tablename__ = 'bmw_sales'
+    # Built by DatabaseLoader.post_load after the bulk load, not with the table
+    __table_args__ = (
+        Index('ix_bmw_sales_year_region', 'year', 'region'),
+        Index('ix_bmw_sales_region', 'region'),
+        Index('ix_bmw_sales_model', 'model'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    model = Column(String(100))
+    year = Column(SmallInteger)
+    region = Column(String(100))
+    color = Column(String(50))
+    fuel_type = Column(String(50))
+    transmission = Column(String(50))
+    engine_size_l = Column(Numeric(5, 2))
+    mileage_km = Column(Integer)
+    price_usd = Column(Numeric(12, 2))
+    sales_volume = Column(Integer)
+    created_at = Column(DateTime, server_default=func.now())
+
+class DataSource(Base):
+    """One row per completed load"""
+    __tablename__ = 'data_sources'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255))
+    source_type = Column(String(50))
+    record_count = Column(Integer)
+    created_at = Column(DateTime, server_default=func.now())
+
+class QueryLog(Base):
+    """Natural language queries processed by the agents"""
+    __tablename__ = 'query_logs'
+    # Failure lookups only touch the (few) failed rows
+    __table_args__ = (
+        Index('ix_query_logs_failures', 'created_at', postgresql_where=text('success = false')),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_query = Column(Text)
+    sql_query = Column(Text)
+    response = Column(Text)
+    execution_time = Column(Float)
+    success = Column(Boolean)
+    error_message = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
@@ -3,9 +3,14 @@
 Script para executar as views de KPIs
 """
 
-import psycopg2
+import sys
+import hashlib
+import os
+import threading
 from psycopg2.extras import RealDictCursor
-import json
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Configurações de conexão
 DB_CONFIG = {
@@ -17,76 +22,267 @@ DB_CONFIG = {
     'client_encoding': 'utf8'
 }
 
+# Views criadas por sql/kpis_views.sql (testadas em test_kpi_views)
+KPI_VIEWS = [
+    'analytics.kpi_executive_dashboard',
+    'analytics.kpi_annual_sales',
+    'analytics.kpi_regional_performance',
+    'analytics.kpi_model_performance',
+    'analytics.kpi_top_10_models',
+    'analytics.kpi_top_5_regions',
+    'analytics.kpi_annual_growth',
+    'analytics.kpi_price_analysis',
+    'analytics.kpi_color_performance',
+    'analytics.kpi_model_efficiency',
+    'analytics.kpi_seasonal_analysis',
+    'analytics.kpi_top_performers',
+    'analytics.kpi_price_volume_correlation',
+    'analytics.kpi_market_penetration',
+    'analytics.kpi_temporal_trends',
+    'analytics.kpi_popular_color_by_region'
+]
+
+# Views materializadas em sql/kpis_views.sql (cada uma com índice único)
+MATERIALIZED_VIEWS = [
+    'analytics.kpi_top_performers',
+    'analytics.kpi_market_penetration',
+    'analytics.kpi_temporal_trends',
+    'analytics.kpi_popular_color_by_region'
+]
+
+# Memória para reconstruir os índices únicos durante o refresh
+REFRESH_MAINTENANCE_WORK_MEM = '256MB'
+
+# Linhas de amostra exibidas por view em test_kpi_views (o LIMIT já traz só essas)
+SAMPLE_ROWS = 3
+
+# Linhas buscadas por lote nos cursores server-side
+STREAM_ITERSIZE = 1000
+
+# Conexões no pool: as etapas sequenciais reaproveitam uma conexão e as
+# consultas independentes do resumo rodam em paralelo até esse limite
+POOL_MAX_CONNECTIONS = 4
+
+# Tabela com o hash do último conteúdo aplicado de cada arquivo SQL (o comentário
+# do schema analytics fica com a documentação definida em sql/init.sql)
+SQL_FILE_STATE_DDL = """
+    CREATE SCHEMA IF NOT EXISTS analytics;
+    CREATE TABLE IF NOT EXISTS analytics.sql_file_state (
+        file_name TEXT PRIMARY KEY,
+        sha1 TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Pool criado no primeiro uso; o lock evita que threads concorrentes criem
+# pools duplicados (e conexões órfãs)
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_connection():
+    """Obter uma conexão do pool (sem novo handshake a cada etapa)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(1, POOL_MAX_CONNECTIONS, **DB_CONFIG)
+    conn = _pool.getconn()
+    conn.set_client_encoding('UTF8')
+    return conn
+
+def release_connection(conn):
+    """Devolver a conexão ao pool (transações pendentes são desfeitas)"""
+    _pool.putconn(conn)
+
+@contextmanager
+def pooled_connection():
+    """
+    Conexão do pool para um bloco with
+    
+    A conexão sempre volta ao pool, inclusive quando o bloco falha; nesse caso
+    a transação em aberto é desfeita antes.
+    """
+    conn = get_connection()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+def iter_rows(conn, query, itersize=STREAM_ITERSIZE):
+    """
+    Iterar sobre o resultado com um cursor nomeado (server-side)
+    
+    As linhas chegam em lotes de itersize, sem carregar o resultado inteiro na memória.
+    """
+    with conn.cursor(name='kpi_stream', cursor_factory=RealDictCursor) as cursor:
+        cursor.itersize = itersize
+        cursor.execute(query)
+        for row in cursor:
+            yield row
+
+def fetch_concurrently(queries):
+    """
+    Executar consultas independentes em paralelo
+    
+    Cada consulta usa sua própria conexão do pool (uma conexão não pode ser
+    compartilhada entre consultas simultâneas). O tempo total passa a ser o da
+    consulta mais lenta, e não a soma de todas.
+    
+    Returns:
+        Lista com as linhas de cada consulta, na mesma ordem de queries
+    """
+    def fetch(query):
+        with pooled_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
+    
+    with ThreadPoolExecutor(max_workers=POOL_MAX_CONNECTIONS) as executor:
+        return list(executor.map(fetch, queries))
+
+def close_pool():
+    """Fechar todas as conexões do pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
 def execute_sql_file(file_path):
-    """Executar arquivo SQL"""
+    """
+    Executar arquivo SQL
+    
+    O hash do arquivo aplicado fica registrado no banco (tabela
+    analytics.sql_file_state); se o arquivo não mudou desde então e todas as
+    views ainda existem, a execução é pulada.
+    
+    Returns:
+        Tupla (sucesso, pulado)
+    """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        conn.set_client_encoding('UTF8')
-        cursor = conn.cursor()
-        
-        with open(file_path, 'r', encoding='utf-8') as file:
-            sql_content = file.read()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+
+            with open(file_path, 'r', encoding='utf-8') as file:
+                sql_content = file.read()
+
+            file_name = os.path.basename(file_path)
+            digest = hashlib.sha1(sql_content.encode('utf-8')).hexdigest()
+
+            cursor.execute(SQL_FILE_STATE_DDL)
+            # O registro sobrevive a um DROP TABLE bmw_sales CASCADE (nova carga do ETL),
+            # que remove as views; por isso elas também precisam existir para pular
+            cursor.execute("""
+                SELECT (SELECT sha1 FROM analytics.sql_file_state WHERE file_name = %s),
+                       (SELECT bool_and(to_regclass(name) IS NOT NULL)
+                        FROM unnest(%s::text[]) AS name)
+            """, (file_name, KPI_VIEWS + MATERIALIZED_VIEWS))
+            applied_digest, views_exist = cursor.fetchone()
+            if applied_digest == digest and views_exist:
+                conn.commit()
+                cursor.close()
+                print(f"Arquivo SQL sem alterações, execução pulada: {file_path}")
+                return True, True
+
+            cursor.execute(sql_content)
+            cursor.execute("""
+                INSERT INTO analytics.sql_file_state (file_name, sha1)
+                VALUES (%s, %s)
+                ON CONFLICT (file_name) DO UPDATE
+                SET sha1 = EXCLUDED.sha1, applied_at = CURRENT_TIMESTAMP
+            """, (file_name, digest))
+            conn.commit()
+
+            cursor.close()
         
-        cursor.execute(sql_content)
-        conn.commit()
+        print(f"Arquivo SQL executado com sucesso: {file_path}")
+        return True, False
         
-        cursor.close()
-        conn.close()
+    except Exception as e:
+        print(f"Erro ao executar {file_path}: {e}")
+        return False, False
+
+def refresh_materialized_views():
+    """Atualizar as views materializadas sem bloquear leituras"""
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(f"SET LOCAL maintenance_work_mem = '{REFRESH_MAINTENANCE_WORK_MEM}'")
+            for view in MATERIALIZED_VIEWS:
+                # CONCURRENTLY usa o índice único: leitores continuam vendo os dados anteriores
+                cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+            conn.commit()
+
+            cursor.close()
         
-        print(f"Arquivo SQL executado com sucesso: {file_path}")
+        print(f"{len(MATERIALIZED_VIEWS)} views materializadas atualizadas")
         return True
         
     except Exception as e:
-        print(f"Erro ao executar {file_path}: {e}")
+        print(f"Erro ao atualizar views materializadas: {e}")
         return False
 
 def test_kpi_views():
     """Testar as views de KPIs"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        conn.set_client_encoding('UTF8')
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        print("=== TESTANDO VIEWS DE KPIs ===")
-        
-        # Lista de views para testar
-        views_to_test = [
-            'analytics.kpi_executive_dashboard',
-            'analytics.kpi_annual_sales',
-            'analytics.kpi_regional_performance',
-            'analytics.kpi_model_performance',
-            'analytics.kpi_top_10_models',
-            'analytics.kpi_top_5_regions',
-            'analytics.kpi_annual_growth',
-            'analytics.kpi_price_analysis',
-            'analytics.kpi_color_performance',
-            'analytics.kpi_model_efficiency',
-            'analytics.kpi_seasonal_analysis',
-            'analytics.kpi_top_performers',
-            'analytics.kpi_price_volume_correlation',
-            'analytics.kpi_market_penetration',
-            'analytics.kpi_temporal_trends'
-        ]
-        
-        for view in views_to_test:
+        with pooled_connection() as conn:
+            # Cursor padrão: as amostras já chegam como JSON, sem um dict por linha
+            cursor = conn.cursor()
+
+            print("=== TESTANDO VIEWS DE KPIs ===")
+
+            # Consulta só ao catálogo (um round-trip): views ausentes não entram nas amostras
+            cursor.execute(
+                "SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NOT NULL",
+                (KPI_VIEWS,)
+            )
+            existing_views = {row[0] for row in cursor.fetchall()}
+
+            # json_agg já devolve cada linha como dict simples, pronto para imprimir
+            sample_sql = "(SELECT COALESCE(json_agg(t), '[]'::json) FROM (SELECT * FROM {} LIMIT %d) t)" % SAMPLE_ROWS
+
+            # Uma única consulta traz as amostras de todas as views (um round-trip);
+            # se alguma view falhar, o loop abaixo testa uma a uma para apontar qual
+            samples_sql = "\nUNION ALL\n".join(
+                f"SELECT '{view}' AS view_name, {sample_sql.format(view)} AS rows"
+                for view in KPI_VIEWS if view in existing_views
+            )
             try:
-                print(f"\n--- Testando {view} ---")
-                cursor.execute(f"SELECT * FROM {view} LIMIT 5")
-                results = cursor.fetchall()
-                
-                if results:
-                    print(f"OK {view}: {len(results)} registros encontrados")
-                    print("Primeiros registros:")
-                    for i, row in enumerate(results[:3]):
-                        print(f"  {i+1}: {dict(row)}")
-                else:
-                    print(f"AVISO {view}: Nenhum registro encontrado")
-                    
+                cursor.execute(samples_sql)
+                samples = dict(cursor.fetchall())
             except Exception as e:
-                print(f"ERRO ao testar {view}: {e}")
-        
-        cursor.close()
-        conn.close()
+                conn.rollback()
+                print(f"AVISO: consulta única das amostras falhou ({e}); testando view a view")
+                samples = None
+
+            for view in KPI_VIEWS:
+                try:
+                    print(f"\n--- Testando {view} ---")
+                    if view not in existing_views:
+                        print(f"ERRO ao testar {view}: view não encontrada")
+                        continue
+                    if samples is not None:
+                        results = samples[view]
+                    else:
+                        cursor.execute(f"SELECT {sample_sql.format(view)} AS rows")
+                        results = cursor.fetchone()[0]
+
+                    if results:
+                        print(f"OK {view}: {len(results)} registros encontrados")
+                        print("Primeiros registros:")
+                        for i, row in enumerate(results):
+                            print(f"  {i+1}: {row}")
+                    else:
+                        print(f"AVISO {view}: Nenhum registro encontrado")
+
+                except Exception as e:
+                    conn.rollback()
+                    print(f"ERRO ao testar {view}: {e}")
+
+            cursor.close()
         
         print("\n=== TESTE CONCLUÍDO ===")
         
@@ -96,108 +292,100 @@ def test_kpi_views():
 def show_kpi_summary():
     """Mostrar resumo dos KPIs"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        conn.set_client_encoding('UTF8')
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        print("=== RESUMO DOS KPIs ===")
-        
-        # Dashboard Executivo
-        print("\n--- Dashboard Executivo ---")
-        cursor.execute("SELECT * FROM analytics.kpi_executive_dashboard")
-        dashboard = cursor.fetchall()
-        
-        for metric in dashboard:
-            print(f"{metric['metric_name']}: {metric['metric_value']} {metric['metric_unit']}")
-        
-        # Top 5 Regiões
-        print("\n--- Top 5 Regiões ---")
-        cursor.execute("SELECT * FROM analytics.kpi_top_5_regions")
-        regions = cursor.fetchall()
-        
-        for i, region in enumerate(regions, 1):
-            print(f"{i}. {region['region']}: ${region['total_revenue']:,.0f} ({region['market_share_revenue_pct']}%)")
-        
-        # Top 5 Modelos
-        print("\n--- Top 5 Modelos ---")
-        cursor.execute("SELECT * FROM analytics.kpi_top_10_models LIMIT 5")
-        models = cursor.fetchall()
-        
-        for i, model in enumerate(models, 1):
-            print(f"{i}. {model['model']}: ${model['total_revenue']:,.0f} ({model['market_share_revenue_pct']}%)")
-        
-        # Análise de Preços
-        print("\n--- Análise de Preços por Segmento ---")
-        cursor.execute("""
-            SELECT price_segment, COUNT(*) as models_count, 
-                   AVG(avg_price) as avg_price, SUM(total_units_sold) as total_units
-            FROM analytics.kpi_price_analysis 
-            GROUP BY price_segment 
-            ORDER BY avg_price DESC
-        """)
-        price_segments = cursor.fetchall()
-        
-        for segment in price_segments:
-            print(f"{segment['price_segment']}: {segment['models_count']} modelos, "
-                  f"Preço médio: ${segment['avg_price']:,.0f}, "
-                  f"Unidades: {segment['total_units']:,}")
-        
-        # Top Cores
-        print("\n--- Top 5 Cores por Vendas ---")
-        cursor.execute("SELECT * FROM analytics.kpi_color_performance LIMIT 5")
-        colors = cursor.fetchall()
-        
-        for i, color in enumerate(colors, 1):
-            print(f"{i}. {color['color']}: {color['total_units_sold']:,} unidades "
-                  f"({color['market_share_units_pct']}%)")
-        
-        # Modelos Mais Eficientes
-        print("\n--- Top 5 Modelos Mais Eficientes ---")
-        cursor.execute("""
-            SELECT model, revenue_per_unit, efficiency_rank, total_units_sold
-            FROM analytics.kpi_model_efficiency 
-            ORDER BY efficiency_rank 
-            LIMIT 5
-        """)
-        efficient_models = cursor.fetchall()
-        
-        for i, model in enumerate(efficient_models, 1):
-            print(f"{i}. {model['model']}: ${model['revenue_per_unit']:,.0f}/unidade "
-                  f"(Rank: {model['efficiency_rank']}, Volume: {model['total_units_sold']:,})")
-        
-        # Market Penetration
-        print("\n--- Penetração de Mercado por Região ---")
-        cursor.execute("""
-            SELECT region, model_penetration_pct, revenue_penetration_pct, 
-                   models_available, fuel_types_available
-            FROM analytics.kpi_market_penetration 
-            ORDER BY revenue_penetration_pct DESC
-        """)
-        penetration = cursor.fetchall()
-        
-        for region in penetration:
-            print(f"{region['region']}: {region['model_penetration_pct']}% modelos, "
-                  f"{region['revenue_penetration_pct']}% receita, "
-                  f"{region['models_available']} modelos, {region['fuel_types_available']} combustíveis")
-        
-        # Tendências Temporais
-        print("\n--- Tendências dos Últimos 3 Anos ---")
-        cursor.execute("""
-            SELECT year, total_units_sold, total_revenue, units_growth_pct, revenue_growth_pct
-            FROM analytics.kpi_temporal_trends 
-            ORDER BY year DESC 
-            LIMIT 3
-        """)
-        trends = cursor.fetchall()
-        
-        for trend in trends:
-            growth_units = f"{trend['units_growth_pct']:+.1f}%" if trend['units_growth_pct'] else "N/A"
-            growth_revenue = f"{trend['revenue_growth_pct']:+.1f}%" if trend['revenue_growth_pct'] else "N/A"
-            print(f"{trend['year']}: {trend['total_units_sold']:,} unidades ({growth_units}), "
-                  f"${trend['total_revenue']:,.0f} ({growth_revenue})")
-        
-        cursor.close()
-        conn.close()
+        # Consultas independentes rodam em paralelo, cada uma em sua conexão do pool
+        dashboard, regions, models, colors, efficient_models, penetration, trends = fetch_concurrently([
+            "SELECT * FROM analytics.kpi_executive_dashboard",
+            "SELECT * FROM analytics.kpi_top_5_regions",
+            "SELECT * FROM analytics.kpi_top_10_models LIMIT 5",
+            "SELECT * FROM analytics.kpi_color_performance LIMIT 5",
+            """
+                SELECT model, revenue_per_unit, efficiency_rank, total_units_sold
+                FROM analytics.kpi_model_efficiency 
+                ORDER BY efficiency_rank 
+                LIMIT 5
+            """,
+            """
+                SELECT region, model_penetration_pct, revenue_penetration_pct, 
+                       models_available, fuel_types_available
+                FROM analytics.kpi_market_penetration 
+                ORDER BY revenue_penetration_pct DESC
+            """,
+            """
+                SELECT year, total_units_sold, total_revenue, units_growth_pct, revenue_growth_pct
+                FROM analytics.kpi_temporal_trends 
+                ORDER BY year DESC 
+                LIMIT 3
+            """
+        ])
+        
+        with pooled_connection() as conn:
+            print("=== RESUMO DOS KPIs ===")
+
+            # Cada bloco é montado em memória e escrito de uma vez
+            # Dashboard Executivo
+            lines = ["\n--- Dashboard Executivo ---"]
+            for metric in dashboard:
+                lines.append(f"{metric['metric_name']}: {metric['metric_value']} {metric['metric_unit']}")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # Top 5 Regiões
+            lines = ["\n--- Top 5 Regiões ---"]
+            for i, region in enumerate(regions, 1):
+                lines.append(f"{i}. {region['region']}: ${region['total_revenue']:,.0f} ({region['market_share_revenue_pct']}%)")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # Top 5 Modelos
+            lines = ["\n--- Top 5 Modelos ---"]
+            for i, model in enumerate(models, 1):
+                lines.append(f"{i}. {model['model']}: ${model['total_revenue']:,.0f} ({model['market_share_revenue_pct']}%)")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # Análise de Preços
+            price_segments = iter_rows(conn, """
+                SELECT price_segment, COUNT(*) as models_count, 
+                       AVG(avg_price) as avg_price, SUM(total_units_sold) as total_units
+                FROM analytics.kpi_price_analysis 
+                GROUP BY price_segment 
+                ORDER BY avg_price DESC
+            """)
+
+            lines = ["\n--- Análise de Preços por Segmento ---"]
+            for segment in price_segments:
+                lines.append(f"{segment['price_segment']}: {segment['models_count']} modelos, "
+                             f"Preço médio: ${segment['avg_price']:,.0f}, "
+                             f"Unidades: {segment['total_units']:,}")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # Top Cores
+            lines = ["\n--- Top 5 Cores por Vendas ---"]
+            for i, color in enumerate(colors, 1):
+                lines.append(f"{i}. {color['color']}: {color['total_units_sold']:,} unidades "
+                             f"({color['market_share_units_pct']}%)")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # Modelos Mais Eficientes
+            lines = ["\n--- Top 5 Modelos Mais Eficientes ---"]
+            for i, model in enumerate(efficient_models, 1):
+                lines.append(f"{i}. {model['model']}: ${model['revenue_per_unit']:,.0f}/unidade "
+                             f"(Rank: {model['efficiency_rank']}, Volume: {model['total_units_sold']:,})")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # Market Penetration
+            lines = ["\n--- Penetração de Mercado por Região ---"]
+            for region in penetration:
+                lines.append(f"{region['region']}: {region['model_penetration_pct']}% modelos, "
+                             f"{region['revenue_penetration_pct']}% receita, "
+                             f"{region['models_available']} modelos, {region['fuel_types_available']} combustíveis")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # Tendências Temporais
+            lines = ["\n--- Tendências dos Últimos 3 Anos ---"]
+            for trend in trends:
+                growth_units = f"{trend['units_growth_pct']:+.1f}%" if trend['units_growth_pct'] else "N/A"
+                growth_revenue = f"{trend['revenue_growth_pct']:+.1f}%" if trend['revenue_growth_pct'] else "N/A"
+                lines.append(f"{trend['year']}: {trend['total_units_sold']:,} unidades ({growth_units}), "
+                             f"${trend['total_revenue']:,.0f} ({growth_revenue})")
+            sys.stdout.write("\n".join(lines) + "\n")
         
     except Exception as e:
         print(f"Erro ao mostrar resumo: {e}")
@@ -205,113 +393,100 @@ def show_kpi_summary():
 def show_advanced_insights():
     """Mostrar insights avançados e perguntas de negócio"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        conn.set_client_encoding('UTF8')
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        print("\n=== INSIGHTS AVANÇADOS E PERGUNTAS DE NEGÓCIO ===")
-        
-        # 1. Qual modelo tem melhor relação preço-eficiência?
-        print("\n--- 1. Modelos com Melhor Relação Preço-Eficiência ---")
-        cursor.execute("""
-            SELECT model, revenue_per_unit, price_per_liter, efficiency_rank
-            FROM analytics.kpi_model_efficiency 
-            WHERE efficiency_rank <= 3
-            ORDER BY efficiency_rank
-        """)
-        efficiency = cursor.fetchall()
-        
-        for model in efficiency:
-            print(f"• {model['model']}: ${model['revenue_per_unit']:,.0f}/unidade, "
-                  f"${model['price_per_liter']:,.0f}/L, Rank: {model['efficiency_rank']}")
-        
-        # 2. Quais regiões têm maior potencial de crescimento?
-        print("\n--- 2. Regiões com Maior Potencial de Crescimento ---")
-        cursor.execute("""
-            SELECT region, revenue_penetration_pct, model_penetration_pct,
-                   (100 - revenue_penetration_pct) as growth_potential
-            FROM analytics.kpi_market_penetration 
-            ORDER BY growth_potential DESC
-        """)
-        growth_potential = cursor.fetchall()
-        
-        for region in growth_potential:
-            print(f"• {region['region']}: {region['revenue_penetration_pct']}% penetração atual, "
-                  f"Potencial: {region['growth_potential']:.1f}%")
-        
-        # 3. Qual cor é mais popular por região?
-        print("\n--- 3. Cores Mais Populares por Região ---")
-        cursor.execute("""
-            SELECT region, color, total_units_sold, market_share_units_pct
-            FROM (
-                SELECT region, color, SUM(sales_volume) as total_units_sold,
-                       ROUND((SUM(sales_volume) * 100.0 / SUM(SUM(sales_volume)) OVER (PARTITION BY region))::numeric, 2) as market_share_units_pct,
-                       RANK() OVER (PARTITION BY region ORDER BY SUM(sales_volume) DESC) as rn
-                FROM bmw_sales 
-                WHERE color IS NOT NULL AND color != 'Unknown'
-                GROUP BY region, color
-            ) ranked
-            WHERE rn = 1
-            ORDER BY total_units_sold DESC
-        """)
-        popular_colors = cursor.fetchall()
-        
-        for color in popular_colors:
-            print(f"• {color['region']}: {color['color']} ({color['market_share_units_pct']}% do mercado)")
-        
-        # 4. Análise de correlação preço-volume
-        print("\n--- 4. Análise de Correlação Preço-Volume ---")
-        cursor.execute("""
-            SELECT price_volume_segment, COUNT(*) as combinations,
-                   AVG(price_volume_correlation) as avg_correlation
-            FROM analytics.kpi_price_volume_correlation 
-            GROUP BY price_volume_segment
-            ORDER BY avg_correlation DESC
-        """)
-        correlations = cursor.fetchall()
-        
-        for corr in correlations:
-            print(f"• {corr['price_volume_segment']}: {corr['combinations']} combinações, "
-                  f"Correlação média: {corr['avg_correlation']:.3f}")
-        
-        # 5. Top performers por múltiplas métricas
-        print("\n--- 5. Top Performers por Múltiplas Métricas ---")
-        cursor.execute("""
-            SELECT model, overall_rank, composite_score, total_units, total_revenue, avg_price
-            FROM analytics.kpi_top_performers 
-            WHERE overall_rank <= 5
-            ORDER BY overall_rank
-        """)
-        top_performers = cursor.fetchall()
-        
-        for performer in top_performers:
-            print(f"• {performer['model']}: Rank {performer['overall_rank']}, "
-                  f"Score: {performer['composite_score']}, "
-                  f"${performer['total_revenue']:,.0f} receita, "
-                  f"${performer['avg_price']:,.0f} preço médio")
-        
-        # 6. Tendências de crescimento por região
-        print("\n--- 6. Tendências de Crescimento por Região (Últimos 3 Anos) ---")
-        cursor.execute("""
-            SELECT region, year, revenue_growth_pct, units_growth_pct
-            FROM analytics.kpi_seasonal_analysis 
-            WHERE year >= (SELECT MAX(year) - 2 FROM bmw_sales)
-            ORDER BY region, year DESC
-        """)
-        regional_trends = cursor.fetchall()
-        
-        current_region = None
-        for trend in regional_trends:
-            if trend['region'] != current_region:
-                print(f"\n• {trend['region']}:")
-                current_region = trend['region']
-            
-            growth_revenue = f"{trend['revenue_growth_pct']:+.1f}%" if trend['revenue_growth_pct'] else "N/A"
-            growth_units = f"{trend['units_growth_pct']:+.1f}%" if trend['units_growth_pct'] else "N/A"
-            print(f"  {trend['year']}: Receita {growth_revenue}, Unidades {growth_units}")
-        
-        cursor.close()
-        conn.close()
+        # Consultas independentes rodam em paralelo, cada uma em sua conexão do pool
+        efficiency, growth_potential, correlations, top_performers = fetch_concurrently([
+            """
+                SELECT model, revenue_per_unit, price_per_liter, efficiency_rank
+                FROM analytics.kpi_model_efficiency 
+                WHERE efficiency_rank <= 3
+                ORDER BY efficiency_rank
+            """,
+            """
+                SELECT region, revenue_penetration_pct, model_penetration_pct,
+                       (100 - revenue_penetration_pct) as growth_potential
+                FROM analytics.kpi_market_penetration 
+                ORDER BY growth_potential DESC
+            """,
+            """
+                SELECT price_volume_segment, COUNT(*) as combinations,
+                       AVG(price_volume_correlation) as avg_correlation
+                FROM analytics.kpi_price_volume_correlation 
+                GROUP BY price_volume_segment
+                ORDER BY avg_correlation DESC
+            """,
+            """
+                SELECT model, overall_rank, composite_score, total_units, total_revenue, avg_price
+                FROM analytics.kpi_top_performers 
+                WHERE overall_rank <= 5
+                ORDER BY overall_rank
+            """
+        ])
+        
+        with pooled_connection() as conn:
+            print("\n=== INSIGHTS AVANÇADOS E PERGUNTAS DE NEGÓCIO ===")
+
+            # Cada bloco é montado em memória e escrito de uma vez
+            # 1. Qual modelo tem melhor relação preço-eficiência?
+            lines = ["\n--- 1. Modelos com Melhor Relação Preço-Eficiência ---"]
+            for model in efficiency:
+                lines.append(f"• {model['model']}: ${model['revenue_per_unit']:,.0f}/unidade, "
+                             f"${model['price_per_liter']:,.0f}/L, Rank: {model['efficiency_rank']}")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # 2. Quais regiões têm maior potencial de crescimento?
+            lines = ["\n--- 2. Regiões com Maior Potencial de Crescimento ---"]
+            for region in growth_potential:
+                lines.append(f"• {region['region']}: {region['revenue_penetration_pct']}% penetração atual, "
+                             f"Potencial: {region['growth_potential']:.1f}%")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # 3. Qual cor é mais popular por região?
+            popular_colors = iter_rows(conn, """
+                SELECT region, color, total_units_sold, market_share_units_pct
+                FROM analytics.kpi_popular_color_by_region 
+                ORDER BY total_units_sold DESC
+            """)
+
+            lines = ["\n--- 3. Cores Mais Populares por Região ---"]
+            for color in popular_colors:
+                lines.append(f"• {color['region']}: {color['color']} ({color['market_share_units_pct']}% do mercado)")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # 4. Análise de correlação preço-volume
+            lines = ["\n--- 4. Análise de Correlação Preço-Volume ---"]
+            for corr in correlations:
+                lines.append(f"• {corr['price_volume_segment']}: {corr['combinations']} combinações, "
+                             f"Correlação média: {corr['avg_correlation']:.3f}")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # 5. Top performers por múltiplas métricas
+            lines = ["\n--- 5. Top Performers por Múltiplas Métricas ---"]
+            for performer in top_performers:
+                lines.append(f"• {performer['model']}: Rank {performer['overall_rank']}, "
+                             f"Score: {performer['composite_score']}, "
+                             f"${performer['total_revenue']:,.0f} receita, "
+                             f"${performer['avg_price']:,.0f} preço médio")
+            sys.stdout.write("\n".join(lines) + "\n")
+
+            # 6. Tendências de crescimento por região
+            regional_trends = iter_rows(conn, """
+                SELECT region, year, revenue_growth_pct, units_growth_pct
+                FROM analytics.kpi_seasonal_analysis 
+                WHERE year >= (SELECT MAX(year) - 2 FROM bmw_sales)
+                ORDER BY region, year DESC
+            """)
+
+            lines = ["\n--- 6. Tendências de Crescimento por Região (Últimos 3 Anos) ---"]
+            current_region = None
+            for trend in regional_trends:
+                if trend['region'] != current_region:
+                    lines.append(f"\n• {trend['region']}:")
+                    current_region = trend['region']
+
+                growth_revenue = f"{trend['revenue_growth_pct']:+.1f}%" if trend['revenue_growth_pct'] else "N/A"
+                growth_units = f"{trend['units_growth_pct']:+.1f}%" if trend['units_growth_pct'] else "N/A"
+                lines.append(f"  {trend['year']}: Receita {growth_revenue}, Unidades {growth_units}")
+            sys.stdout.write("\n".join(lines) + "\n")
         
     except Exception as e:
         print(f"Erro ao mostrar insights avançados: {e}")
@@ -322,9 +497,14 @@ def main():
     
     # 1. Executar arquivo SQL
     print("\n1. Executando arquivo SQL...")
-    success = execute_sql_file('sql/kpis_views.sql')
+    success, skipped = execute_sql_file('sql/kpis_views.sql')
     
     if success:
+        # Quando o arquivo é executado, as views materializadas acabam de ser criadas com
+        # os dados atuais; só quando ele é pulado é preciso recalculá-las
+        if skipped:
+            refresh_materialized_views()
+        
         # 2. Testar views
         print("\n2. Testando views...")
         test_kpi_views()
@@ -340,6 +520,8 @@ def main():
         print("\nViews de KPIs criadas e testadas com sucesso!")
     else:
         print("\nFalha ao executar views de KPIs")
+    
+    close_pool()
 
 if __name__ == "__main__":
     main()
@@ -2,7 +2,14 @@
 ETL package for data extraction, transformation, and loading
 """
 
-from .kaggle_extractor import KaggleExtractor
-from .data_processor import DataProcessor
-
 __all__ = ['KaggleExtractor', 'DataProcessor']
+
+def __getattr__(name):
+    # Resolved on first access so `python -m etl --help` doesn't import pandas/kaggle
+    if name == 'KaggleExtractor':
+        from .kaggle_extractor import KaggleExtractor
+        return KaggleExtractor
+    if name == 'DataProcessor':
+        from .data_processor import DataProcessor
+        return DataProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
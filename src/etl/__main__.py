@@ -0,0 +1,9 @@
+"""
+Run the ETL pipeline with `python -m etl` (from src/)
+"""
+import sys
+
+from etl.pipeline import cli
+
+if __name__ == "__main__":
+    sys.exit(cli())
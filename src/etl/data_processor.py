@@ -32,8 +32,8 @@ class DataProcessor:
         """
         logger.info(f"Starting data cleaning. Original shape: {df.shape}")
         
-        # Make a copy to avoid modifying original
-        cleaned_df = df.copy()
+        # Shallow copy: with Copy-on-Write enabled (the ETL entrypoint does so) the data is only duplicated on write
+        cleaned_df = df.copy(deep=False)
         
         # Drop duplicates
         if drop_duplicates:
@@ -49,12 +49,17 @@ class DataProcessor:
             after_drop = len(cleaned_df)
             logger.info(f"Dropped {before_drop - after_drop} rows with missing values")
         elif handle_missing == 'fill':
-            # Fill numeric columns with median, categorical with mode
-            for col in cleaned_df.columns:
-                if cleaned_df[col].dtype in ['int64', 'float64']:
-                    cleaned_df[col].fillna(cleaned_df[col].median(), inplace=True)
-                else:
-                    cleaned_df[col].fillna(cleaned_df[col].mode()[0] if not cleaned_df[col].mode().empty else 'Unknown', inplace=True)
+            # Fill numeric columns with median, categorical with mode (one bulk op each)
+            num_cols = cleaned_df.select_dtypes(include=[np.number]).columns
+            if len(num_cols) > 0:
+                cleaned_df[num_cols] = cleaned_df[num_cols].fillna(cleaned_df[num_cols].median())
+
+            other_cols = cleaned_df.columns.difference(num_cols, sort=False)
+            if len(other_cols) > 0:
+                modes = cleaned_df[other_cols].mode(dropna=True)
+                fill_values = modes.iloc[0] if not modes.empty else pd.Series(dtype=object)
+                fill_values = fill_values.reindex(other_cols).fillna('Unknown')
+                cleaned_df[other_cols] = cleaned_df[other_cols].fillna(fill_values)
         elif handle_missing == 'interpolate':
             # Only interpolate numeric columns
             numeric_cols = cleaned_df.select_dtypes(include=[np.number]).columns
@@ -81,35 +86,45 @@ class DataProcessor:
         """
         logger.info("Starting BMW data transformation")
         
-        transformed_df = df.copy()
-        
         # Standardize column names
-        transformed_df.columns = transformed_df.columns.str.lower().str.replace(' ', '_')
+        renamed_df = df.set_axis(df.columns.str.lower().str.replace(' ', '_'), axis=1)
+        
+        # Collect every converted/derived column, then apply them in one assign
+        derived = {}
         
-        # Convert year column to integer (not datetime)
-        if 'year' in transformed_df.columns:
+        # Convert year column to integer (not datetime); the data has no month, so no year_month is stored
+        if 'year' in renamed_df.columns:
+            year = pd.to_numeric(renamed_df['year'], errors='coerce')
             try:
-                transformed_df['year'] = pd.to_numeric(transformed_df['year'], errors='coerce').astype('Int64')
-            except:
+                year = year.astype('Int16')
+            except (TypeError, ValueError):
                 pass
-        
-        # Create derived features
-        if 'year' in transformed_df.columns:
-            # Create year_month from year only (since month column doesn't exist)
-            transformed_df['year_month'] = transformed_df['year'].astype(str) + '-01'
+            derived['year'] = year
         
         # Add sales metrics if sales data exists
-        sales_columns = [col for col in transformed_df.columns if 'sales' in col.lower() or 'units' in col.lower() or 'volume' in col.lower()]
-        if sales_columns:
-            # Convert to numeric and handle non-numeric values
-            numeric_sales = transformed_df[sales_columns].apply(pd.to_numeric, errors='coerce')
-            transformed_df['total_sales'] = numeric_sales.sum(axis=1)
-        
-        # Ensure numeric columns are properly converted
-        numeric_columns = ['engine_size_l', 'mileage_km', 'price_usd', 'sales_volume']
-        for col in numeric_columns:
-            if col in transformed_df.columns:
-                transformed_df[col] = pd.to_numeric(transformed_df[col], errors='coerce')
+        sales_df = renamed_df.filter(regex='sales|units|volume')
+        if not sales_df.columns.empty:
+            derived['total_sales'] = sales_df.apply(pd.to_numeric, errors='coerce').sum(axis=1)
+        
+        # Ensure numeric columns are properly converted (bad values become NaN),
+        # narrowing whole-number columns to a nullable integer type
+        numeric_columns = {
+            'engine_size_l': None,
+            'mileage_km': 'Int32',
+            'price_usd': None,
+            'sales_volume': 'Int32'
+        }
+        for col, int_dtype in numeric_columns.items():
+            if col in renamed_df.columns:
+                values = pd.to_numeric(renamed_df[col], errors='coerce')
+                if int_dtype:
+                    try:
+                        values = values.astype(int_dtype)
+                    except (TypeError, ValueError):
+                        pass
+                derived[col] = values
+        
+        transformed_df = renamed_df.assign(**derived)
         
         logger.info("BMW data transformation completed")
         return transformed_df
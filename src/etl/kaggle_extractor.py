@@ -2,23 +2,64 @@
 Kaggle data extractor with improved functionality
 """
 import os
+import hashlib
 import pandas as pd
 import kagglehub
 from kaggle.api.kaggle_api_extended import KaggleApi
 from dotenv import load_dotenv
 import logging
+from typing import ClassVar, Optional
+
+# PyArrow's multithreaded CSV reader and the Parquet cache are optional;
+# pandas CSV parsing is the fallback
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = pq = pa_csv = None
+
+# pandas dtype names and the Arrow types the PyArrow CSV reader uses for them
+ARROW_TYPE_ALIASES = {
+    'object': 'string',
+    'string': 'string',
+    'float64': 'float64',
+    'Int16': 'int16',
+    'Int32': 'int32',
+    'Int64': 'int64'
+}
+
+def _arrow_column_types(dtype):
+    """Arrow column types for a pandas dtype mapping, or None if one has no Arrow equivalent"""
+    try:
+        return {col: pa.type_for_alias(ARROW_TYPE_ALIASES[str(col_type)])
+                for col, col_type in dtype.items()}
+    except KeyError:
+        return None
+
+# Parsed CSV files are cached here as Parquet, keyed by file name and absolute path
+PARQUET_CACHE_DIR = os.path.join('data', 'cache')
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class KaggleExtractor:
+    # Authenticated client shared by every extractor instance
+    _api: ClassVar[Optional[KaggleApi]] = None
+    
     def __init__(self):
-        """Initialize Kaggle API"""
-        self.api = KaggleApi()
-        self.api.authenticate()
+        """Initialize Kaggle extractor (API authentication is deferred)"""
+        
+    @property
+    def api(self) -> KaggleApi:
+        """Kaggle API client, authenticated on first use"""
+        cls = type(self)
+        if cls._api is None:
+            api = KaggleApi()
+            api.authenticate()
+            cls._api = api
+        return cls._api
         
     def download_dataset(self, dataset_name, download_path="data/raw"):
         """
@@ -57,6 +98,11 @@ class KaggleExtractor:
         """
         Load CSV file into pandas DataFrame
         
+        Uses PyArrow's CSV reader when available and no pandas-specific
+        arguments other than dtype are given (dtype becomes the Arrow column
+        types). Otherwise, or if PyArrow cannot parse the file, falls back
+        to pd.read_csv.
+        
         Args:
             file_path (str): Path to CSV file
             **kwargs: Additional arguments for pd.read_csv
@@ -65,13 +111,155 @@ class KaggleExtractor:
             pd.DataFrame: Loaded data
         """
         try:
-            df = pd.read_csv(file_path, **kwargs)
+            dtype = kwargs.pop('dtype', None)
+            column_types = _arrow_column_types(dtype) if dtype and pa is not None else {}
+            df = None
+            if pa_csv is not None and not kwargs and column_types is not None:
+                try:
+                    table = pa_csv.read_csv(
+                        file_path,
+                        read_options=pa_csv.ReadOptions(use_threads=True, block_size=64 << 20),
+                        convert_options=pa_csv.ConvertOptions(column_types=column_types)
+                    )
+                    # self_destruct frees Arrow buffers as pandas takes ownership
+                    df = table.to_pandas(self_destruct=True)
+                except pa.ArrowInvalid as e:
+                    # e.g. a malformed value in a column Arrow inferred as numeric
+                    logger.warning(f"PyArrow could not parse {file_path}, using pandas: {e}")
+            if df is None:
+                df = pd.read_csv(file_path, dtype=dtype, **kwargs)
             logger.info(f"Loaded CSV with shape: {df.shape}")
             return df
         except Exception as e:
             logger.error(f"Error loading CSV {file_path}: {e}")
             raise
     
+    def load_csv_chunks(self, file_path, chunksize=100_000, **kwargs):
+        """
+        Load CSV file in chunks to keep memory bounded
+        
+        Args:
+            file_path (str): Path to CSV file
+            chunksize (int): Number of rows per chunk
+            **kwargs: Additional arguments for pd.read_csv
+            
+        Yields:
+            pd.DataFrame: One chunk of the file at a time
+        """
+        try:
+            with pd.read_csv(file_path, chunksize=chunksize, engine='c', **kwargs) as reader:
+                for chunk in reader:
+                    yield chunk
+        except Exception as e:
+            logger.error(f"Error loading CSV {file_path}: {e}")
+            raise
+    
+    def _parquet_cache_path(self, file_path, cache_dir):
+        """Parquet cache file for a CSV file (same-named files in other directories get their own)"""
+        abs_path = os.path.abspath(file_path)
+        name = os.path.splitext(os.path.basename(abs_path))[0]
+        path_hash = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(cache_dir, f"{name}-{path_hash}.parquet")
+    
+    def _is_cache_fresh(self, file_path, cache_path):
+        """Check whether a Parquet cache is newer than its CSV file"""
+        return (os.path.exists(cache_path)
+                and os.path.getmtime(cache_path) > os.path.getmtime(file_path))
+    
+    def load_csv_cached(self, file_path, cache_dir=PARQUET_CACHE_DIR, **kwargs):
+        """
+        Load CSV file through a Parquet cache
+        
+        The parsed file is written to cache_dir as zstd Parquet; later calls
+        read the cache instead of parsing the CSV again while it is newer
+        than the CSV. Without pyarrow this is load_csv.
+        
+        Args:
+            file_path (str): Path to CSV file
+            cache_dir (str): Directory holding the Parquet cache
+            **kwargs: Additional arguments for pd.read_csv
+            
+        Returns:
+            pd.DataFrame: Loaded data
+        """
+        if pq is None:
+            return self.load_csv(file_path, **kwargs)
+        
+        cache_path = self._parquet_cache_path(file_path, cache_dir)
+        if self._is_cache_fresh(file_path, cache_path):
+            try:
+                df = pq.read_table(cache_path).to_pandas(split_blocks=True, self_destruct=True)
+                logger.info(f"Loaded cached Parquet with shape: {df.shape}")
+                return df
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable Parquet cache {cache_path}: {e}")
+        
+        df = self.load_csv(file_path, **kwargs)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            df.to_parquet(cache_path, engine='pyarrow', compression='zstd', index=False)
+        except Exception as e:
+            logger.warning(f"Could not write Parquet cache {cache_path}: {e}")
+        return df
+    
+    def load_csv_chunks_cached(self, file_path, chunksize=100_000,
+                               cache_dir=PARQUET_CACHE_DIR, **kwargs):
+        """
+        Load CSV file in chunks through a Parquet cache
+        
+        Chunks are read from a fresh cache with ParquetFile.iter_batches;
+        otherwise the CSV is parsed chunk by chunk and each chunk is appended
+        to a new cache file as it is yielded. Without pyarrow this is
+        load_csv_chunks.
+        
+        Args:
+            file_path (str): Path to CSV file
+            chunksize (int): Number of rows per chunk
+            cache_dir (str): Directory holding the Parquet cache
+            **kwargs: Additional arguments for pd.read_csv
+            
+        Yields:
+            pd.DataFrame: One chunk of the file at a time
+        """
+        if pq is None:
+            yield from self.load_csv_chunks(file_path, chunksize=chunksize, **kwargs)
+            return
+        
+        cache_path = self._parquet_cache_path(file_path, cache_dir)
+        if self._is_cache_fresh(file_path, cache_path):
+            logger.info(f"Reading cached Parquet: {cache_path}")
+            for batch in pq.ParquetFile(cache_path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas(split_blocks=True, self_destruct=True)
+            return
+        
+        # Written under a temporary name so an interrupted run leaves no partial cache
+        tmp_path = f"{cache_path}.tmp"
+        writer = None
+        caching = True
+        try:
+            for chunk in self.load_csv_chunks(file_path, chunksize=chunksize, **kwargs):
+                if caching:
+                    try:
+                        if writer is None:
+                            os.makedirs(cache_dir, exist_ok=True)
+                            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                            writer = pq.ParquetWriter(tmp_path, schema, compression='zstd')
+                        writer.write_table(pa.Table.from_pandas(chunk, schema=schema,
+                                                                preserve_index=False))
+                    except Exception as e:
+                        logger.warning(f"Could not write Parquet cache {cache_path}: {e}")
+                        caching = False
+                yield chunk
+            if caching and writer is not None:
+                writer.close()
+                writer = None
+                os.replace(tmp_path, cache_path)
+        finally:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
     def get_dataset_info(self, dataset_name):
         """Get information about a dataset"""
         try:
@@ -87,6 +275,9 @@ class KaggleExtractor:
 
 def main():
     """Example usage"""
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    
     extractor = KaggleExtractor()
     
     # Download BMW dataset
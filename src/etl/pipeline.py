@@ -3,92 +3,290 @@ ETL Pipeline Runner - Versão Organizada e Limpa
 """
 import os
 import sys
+import json
+import hashlib
 import logging
+import logging.handlers
+import argparse
+from pathlib import Path
 from datetime import datetime
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from etl.kaggle_extractor import KaggleExtractor
-from etl.data_processor import DataProcessor
-from database.loader import DatabaseLoader
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/etl.log'),
-        logging.StreamHandler()
-    ]
-)
+# pandas, SQLAlchemy, psycopg2 and the Kaggle client are imported where they are
+# used, so `--help` and early exits don't pay for them
+
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main ETL pipeline execution"""
-    logger.info("Starting ETL pipeline execution")
+# Load modes: 'fresh' recreates bmw_sales before loading, 'append' adds to it
+ETL_MODES = ('fresh', 'append')
+
+# Log records buffered in memory before they are written to logs/etl.log
+LOG_BUFFER_CAPACITY = 1024
+
+def setup_logging():
+    """Log to logs/etl.log and the console, unless logging is already configured"""
+    if logging.getLogger().handlers:
+        return
+    os.makedirs('logs', exist_ok=True)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    # Records are written to the file in batches (or at once on an error)
+    file_handler = logging.FileHandler('logs/etl.log', delay=True)
+    file_handler.setFormatter(formatter)
+    buffered_handler = logging.handlers.MemoryHandler(
+        LOG_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=file_handler
+    )
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    
+    logging.basicConfig(level=logging.INFO, handlers=[buffered_handler, stream_handler])
+
+def flush_logging():
+    """Write out log records still buffered for the log file"""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+# Rows read per CSV chunk
+CSV_CHUNK_SIZE = 100_000
+
+# Text columns of the BMW sales CSV, fixed so every chunk parses them the same way.
+# Numeric columns are left to inference: a malformed value must not fail the whole
+# file, so DataProcessor.transform_bmw_data coerces them (bad values become NaN)
+BMW_CSV_DTYPES = {
+    'Model': 'object',
+    'Region': 'object',
+    'Color': 'object',
+    'Fuel_Type': 'object',
+    'Transmission': 'object',
+    'Sales_Classification': 'object'
+}
+
+# File path -> sha256/mtime/size of the CSV files behind the last successful load
+ETL_MANIFEST_PATH = os.path.join('logs', 'etl_manifest.json')
+
+def file_sha256(file_path, block_size=1 << 20):
+    """Hash a file in fixed-size blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(manifest_path=ETL_MANIFEST_PATH):
+    """Read the manifest of the last successful load (empty if there is none)"""
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest, manifest_path=ETL_MANIFEST_PATH):
+    """Persist the manifest after a successful load"""
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def build_manifest(file_paths, previous=None):
+    """
+    Describe files by sha256, mtime and size
+    
+    Files whose mtime and size match the previous manifest keep their stored
+    hash instead of being read again.
+    """
+    previous = previous or {}
+    manifest = {}
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        entry = previous.get(file_path)
+        if entry and entry.get('mtime') == stat.st_mtime and entry.get('size') == stat.st_size:
+            manifest[file_path] = entry
+        else:
+            manifest[file_path] = {
+                'sha256': file_sha256(file_path),
+                'mtime': stat.st_mtime,
+                'size': stat.st_size
+            }
+    return manifest
+
+def iter_transformed_chunks(csv_files, extractor, processor, incomplete):
+    """
+    Read, clean, transform and validate CSV files chunk by chunk
+    
+    Chunks that fail validation are skipped and their file is appended to incomplete.
+    """
+    for file_path in csv_files:
+        filename = os.path.basename(file_path)
+        try:
+            logger.info(f"Processing file: {file_path}")
+            file_records = 0
+            
+            for chunk in extractor.load_csv_chunks_cached(file_path, chunksize=CSV_CHUNK_SIZE,
+                                                          dtype=BMW_CSV_DTYPES):
+                # Clean data
+                cleaned_df = processor.clean_data(chunk)
+                
+                # Transform data (BMW specific)
+                transformed_df = processor.transform_bmw_data(cleaned_df)
+                
+                # Validate data
+                if processor.validate_data(transformed_df):
+                    file_records += len(transformed_df)
+                    yield transformed_df
+                else:
+                    logger.warning(f"Data validation failed for a chunk of {file_path}")
+                    incomplete.append(file_path)
+            
+            logger.info(f"Successfully processed {filename}: {file_records} records")
+            
+        except Exception as e:
+            logger.error(f"Error processing {file_path}: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            # Earlier chunks of this file are already in the COPY transaction; fail it
+            raise
+
+def read_csv_file(file_path):
+    """
+    Read one CSV file in a worker process
+    
+    Returns:
+        Raw DataFrame for the file, or None if it could not be read
+    """
+    from etl.kaggle_extractor import KaggleExtractor
+    
+    try:
+        logger.info(f"Reading file: {file_path}")
+        return KaggleExtractor().load_csv_cached(file_path, dtype=BMW_CSV_DTYPES)
+    except Exception as e:
+        logger.error(f"Error reading {file_path}: {e}")
+        return None
+
+def process_csv_files(csv_files, processor, executor, incomplete):
+    """
+    Read several CSV files in parallel, then clean/transform/validate them as one frame
+    
+    Files that could not be read are appended to incomplete.
+    
+    Returns:
+        Transformed DataFrame, or None if nothing was valid
+    """
+    import pandas as pd
+    
+    dfs = []
+    for file_path, df in zip(csv_files, executor.map(read_csv_file, csv_files)):
+        if df is None:
+            incomplete.append(file_path)
+        else:
+            dfs.append(df)
+    if not dfs:
+        return None
+    
+    # One vectorized pass over every row instead of one pass per file
+    combined_df = pd.concat(dfs, ignore_index=True)
+    del dfs
+    transformed_df = processor.transform_bmw_data(processor.clean_data(combined_df))
+    if not processor.validate_data(transformed_df):
+        logger.warning("Data validation failed for the combined CSV files")
+        return None
+    
+    logger.info(f"Successfully processed {len(csv_files)} files: {len(transformed_df)} records")
+    return transformed_df
+
+def main(mode='fresh'):
+    """
+    Main ETL pipeline execution
+    
+    Args:
+        mode: 'fresh' to recreate and reload bmw_sales, 'append' to add to it
+    """
+    if mode not in ETL_MODES:
+        raise ValueError(f"Unknown ETL mode: {mode}")
+    logger.info(f"Starting ETL pipeline execution ({mode} mode)")
     
     try:
+        import pandas as pd
+        
+        # Enable Copy-on-Write before any DataFrame is built (pandas>=2.1 is required)
+        pd.set_option('mode.copy_on_write', True)
+        
+        from concurrent.futures import ProcessPoolExecutor
+        from etl.kaggle_extractor import KaggleExtractor
+        from etl.data_processor import DataProcessor
+        from database.loader import DatabaseLoader
+        
         # Initialize components
         extractor = KaggleExtractor()
         processor = DataProcessor()
         loader = DatabaseLoader()
         
-        # Step 1: Create tables
-        logger.info("Step 1: Creating database tables")
-        if not loader.create_tables():
-            logger.error("Failed to create tables")
-            return False
+        # Step 1: Extract data from Kaggle (kagglehub reuses its local cache)
+        logger.info("Step 1: Extracting data from Kaggle")
+        dataset_path = extractor.download_dataset("sidraaazam/bmw-global-sales-analysis")
         
-        # Step 2: Clear existing data
-        logger.info("Step 2: Clearing existing data")
-        loader.clear_existing_data()
+        # List downloaded CSV files (sorted so the manifest and load order are stable)
+        csv_files = sorted(str(path) for path in Path(dataset_path).rglob('*.csv'))
+        logger.info(f"Downloaded {len(csv_files)} CSV files")
         
-        # Step 3: Extract data from Kaggle
-        logger.info("Step 3: Extracting data from Kaggle")
-        dataset_path = extractor.download_dataset("sidraaazam/bmw-global-sales-analysis")
+        # Skip the reload when the files match the last successful load
+        previous_manifest = load_manifest()
+        manifest = build_manifest(csv_files, previous_manifest)
+        if csv_files and manifest == previous_manifest:
+            table_info = loader.get_table_info('bmw_sales')
+            if table_info and table_info['row_count'] > 0:
+                logger.info("Source files unchanged since the last load, skipping ETL")
+                return True
         
-        # List downloaded files
-        files = extractor.list_files(dataset_path)
-        logger.info(f"Downloaded {len(files)} files")
+        if mode == 'fresh':
+            # Step 2: Create tables
+            logger.info("Step 2: Creating database tables")
+            if not loader.create_tables():
+                logger.error("Failed to create tables")
+                return False
+            
+            # Step 3: Clear existing data
+            logger.info("Step 3: Clearing existing data")
+            loader.clear_existing_data()
         
         # Step 4: Process data
         logger.info("Step 4: Processing data")
         total_records = 0
         
-        for file_path in files:
-            if file_path.endswith('.csv'):
-                try:
-                    logger.info(f"Processing file: {file_path}")
-                    
-                    # Load CSV
-                    df = extractor.load_csv(file_path)
-                    logger.info(f"Loaded CSV with shape: {df.shape}")
-                    logger.info(f"Columns: {list(df.columns)}")
-                    
-                    # Clean data
-                    cleaned_df = processor.clean_data(df)
-                    
-                    # Transform data (BMW specific)
-                    transformed_df = processor.transform_bmw_data(cleaned_df)
-                    
-                    # Validate data
-                    if processor.validate_data(transformed_df):
-                        # Load into database using DatabaseLoader
-                        filename = os.path.basename(file_path)
-                        success = loader.load_bmw_sales(transformed_df, f"BMW Sales - {filename}")
-                        if success:
-                            total_records += len(transformed_df)
-                            logger.info(f"Successfully processed {filename}: {len(transformed_df)} records")
-                        else:
-                            logger.error(f"Failed to load {filename}")
-                    else:
-                        logger.warning(f"Data validation failed for {file_path}")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing {file_path}: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
+        # Indexes are rebuilt after the load instead of maintained row by row
+        loader.pre_load()
+        
+        # Files that were skipped or only partly loaded; the manifest is only
+        # saved when this stays empty, so an incomplete load is retried next run
+        incomplete = []
+        
+        # Load every file's transformed data in one COPY transaction
+        if csv_files:
+            source_name = f"BMW Sales - {', '.join(os.path.basename(f) for f in csv_files)}"
+            if len(csv_files) > 1:
+                # Parse files in parallel processes, then transform them together
+                workers = min(os.cpu_count() or 1, len(csv_files))
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    transformed_df = process_csv_files(csv_files, processor, executor, incomplete)
+                total_records = loader.bulk_load_bmw_sales([transformed_df], source_name)
+                # Don't hold the whole dataset through index builds and stats
+                del transformed_df
+            else:
+                # A single file is streamed chunk by chunk to keep memory bounded
+                total_records = loader.bulk_load_bmw_sales(
+                    iter_transformed_chunks(csv_files, extractor, processor, incomplete), source_name
+                )
+            if not total_records:
+                logger.error("Failed to load transformed data")
+                return False
+        
+        if not loader.post_load():
+            logger.warning("Post-load steps failed; the next run will reload the files")
+        elif incomplete:
+            logger.warning(f"Incomplete load ({len(set(incomplete))} files with skipped data); "
+                           "the next run will reload the files")
+        else:
+            save_manifest(manifest)
         
         # Step 5: Generate summary
         logger.info("Step 5: Generating ETL summary")
@@ -109,16 +307,25 @@ def main():
         logger.error(traceback.format_exc())
         return False
 
-if __name__ == "__main__":
-    # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
+def cli(argv=None):
+    """Command line entrypoint shared by this script and `python -m etl`"""
+    parser = argparse.ArgumentParser(description="Run the BMW sales ETL pipeline")
+    parser.add_argument('--mode', choices=ETL_MODES, default='fresh',
+                        help="fresh: recreate bmw_sales and reload it; append: add to it")
+    args = parser.parse_args(argv)
+    
+    setup_logging()
     
     # Run ETL pipeline
-    success = main()
+    success = main(args.mode)
+    flush_logging()
     
     if success:
         print("ETL pipeline completed successfully!")
-        sys.exit(0)
+        return 0
     else:
         print("ETL pipeline failed!")
-        sys.exit(1)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -2,30 +2,18 @@
 Streamlit Web Interface for Natural Language SQL Agent - BMW Sales Analytics
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import json
+import functools
 import sys
 import os
 from datetime import datetime
-import importlib.util
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-# Import Natural Language SQL Agent
-spec = importlib.util.spec_from_file_location("mcp_agent", os.path.join(os.path.dirname(__file__), '..', 'agents', 'mcp_agent.py'))
-mcp_agent_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(mcp_agent_module)
-NaturalLanguageSQLAgent = mcp_agent_module.NaturalLanguageSQLAgent
-
-# Import Orchestrator Agent (includes SQL + Visualization)
-spec_orch = importlib.util.spec_from_file_location("orchestrator_agent", os.path.join(os.path.dirname(__file__), '..', 'agents', 'orchestrator_agent.py'))
-orchestrator_module = importlib.util.module_from_spec(spec_orch)
-spec_orch.loader.exec_module(orchestrator_module)
-OrchestratorAgent = orchestrator_module.OrchestratorAgent
+# Regular package imports: modules are compiled once and cached in sys.modules
+from agents.mcp_agent import NaturalLanguageSQLAgent, create_connection_pool
 
 # Import database config
 from config.database import test_connection
@@ -39,7 +27,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -86,18 +74,29 @@ st.markdown("""
         font-weight: bold;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Custom CSS collapsed to one line, built once at import
+CUSTOM_CSS_BLOB = " ".join(CUSTOM_CSS.split())
+
+# Emitted on every rerun: Streamlit drops elements a rerun does not re-create
+st.markdown(CUSTOM_CSS_BLOB, unsafe_allow_html=True)
+
+@st.cache_resource
+def get_db_pool():
+    """Connection pool shared by every session, so queries skip the connect handshake"""
+    return create_connection_pool(minconn=1, maxconn=5)
 
 @st.cache_resource
 def initialize_sql_agent():
     """Initialize Natural Language SQL Agent"""
     try:
         # Initialize agent
-        agent = NaturalLanguageSQLAgent()
+        agent = NaturalLanguageSQLAgent(pool=get_db_pool())
         
         # Test if agent can connect to database
         try:
-            result = agent.process_natural_language_query("Mostre o dashboard executivo")
+            result = _cached_dashboard(agent)
             if not result['success']:
                 st.error("❌ Natural Language SQL Agent initialized but database connection failed")
                 return None
@@ -115,6 +114,9 @@ def initialize_sql_agent():
 def initialize_orchestrator_agent():
     """Initialize Orchestrator Agent (SQL + Visualization)"""
     try:
+        # SQL + Visualization; imported here so only the AI Visualization page pays for it
+        from agents.orchestrator_agent import OrchestratorAgent
+        
         # Get AI provider from session state or default to OpenAI
         ai_provider = st.session_state.get('ai_provider', 'openai')
         
@@ -127,6 +129,121 @@ def initialize_orchestrator_agent():
         st.error(f"❌ Error initializing Orchestrator Agent: {e}")
         return None
 
+# Result rows rendered in the browser; larger results are offered as a CSV download
+MAX_DISPLAY_ROWS = 1000
+
+# Natural language query behind the executive dashboard
+DASHBOARD_QUERY = "Mostre o dashboard executivo"
+
+# Leading underscore: Streamlit does not hash the agent argument, so these are
+# cached once per TTL window instead of re-running the queries on every rerun
+@st.cache_data(ttl=60, max_entries=4, show_spinner=False)
+def _cached_dashboard(_agent):
+    """Executive dashboard query result, shared by every page that shows it"""
+    return _agent.process_natural_language_query(DASHBOARD_QUERY)
+
+def run_query(agent, query):
+    """Run a natural language query, reusing the cached result for the dashboard query"""
+    if query.strip().lower() == DASHBOARD_QUERY.lower():
+        return _cached_dashboard(agent)
+    return agent.process_natural_language_query(query)
+
+def _dashboard_metrics(agent):
+    """Dashboard metrics as {metric_name: metric_value} (empty if the query failed)"""
+    result = _cached_dashboard(agent)
+    if not result.get('success'):
+        return {}
+    return result.get('metrics', {})
+
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False)
+def _cached_available_queries(_agent):
+    """Predefined query types (rarely change)"""
+    return _agent.get_available_queries()
+
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False)
+def _cached_database_schema(_agent):
+    """
+    Database tables and views (rarely change), with each column/view list
+    already built into a DataFrame so reruns reuse the frames
+    """
+    # The ttl decides when the schema is re-read, so bypass the agent's own
+    # cache (it never expires); shallow copy since the agent keeps the dict
+    schema = dict(_agent.get_database_schema(refresh=True))
+    for section in ('tables', 'views'):
+        if section in schema:
+            schema[section] = {
+                name: pd.DataFrame.from_records(rows) if rows else None
+                for name, rows in schema[section].items()
+            }
+    return schema
+
+@st.cache_data(ttl=30, max_entries=1, show_spinner=False)
+def _db_alive():
+    """Lightweight SELECT 1 health check for the sidebar status"""
+    return test_connection()
+
+def _set_state(**values):
+    """Button callback: update session state before the page is rendered"""
+    for key, value in values.items():
+        st.session_state[key] = value
+
+def _pop_state(*keys):
+    """Button callback: drop session state keys before the page is rendered"""
+    for key in keys:
+        st.session_state.pop(key, None)
+
+def _use_example_query(agent):
+    """Button callback: run the selected example query"""
+    query = st.session_state.pop('example_query', None)
+    if query:
+        with st.spinner("Processing your query..."):
+            st.session_state.last_result = run_query(agent, query)
+        st.session_state.last_query = query
+
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _cached_suggestions(fingerprint, _df, _orchestrator):
+    """Visualization suggestions, cached on a cheap fingerprint of the data"""
+    return _orchestrator.suggest_visualizations(_df)
+
+def _data_fingerprint(df):
+    """Shape, dtypes and a hash of the first rows; changes whenever a new query result is stored"""
+    return (
+        df.shape,
+        tuple(df.columns),
+        tuple(df.dtypes.astype(str)),
+        int(pd.util.hash_pandas_object(df.head(50)).sum())
+    )
+
+def _show_png(image_base64):
+    """Render a base64 PNG as a data URL; the browser decodes it, not the server"""
+    st.markdown(f'<img src="data:image/png;base64,{image_base64}" style="width:100%"/>',
+                unsafe_allow_html=True)
+
+def _run_selected_query(agent, query):
+    """Button callback: run a predefined query once and keep its result for reruns"""
+    with st.spinner("Processing query..."):
+        st.session_state.selected_result = run_query(agent, query)
+    st.session_state.selected_query = query
+
+@st.fragment(run_every=30)
+def _sidebar_status(agent):
+    """Sidebar connection status and quick stats, refreshed every 30s without a full rerun"""
+    # Database connection status
+    st.header("🔗 Connection Status")
+    if _db_alive():
+        st.success("✅ Database Connected")
+    else:
+        st.error("❌ Database Disconnected")
+        # Drop the cached probe so the fragment rerun checks again
+        st.button("🔄 Retry connection", key="retry_connection", on_click=_db_alive.clear)
+    
+    # Quick stats
+    st.header("📊 Quick Stats")
+    try:
+        st.metric("Total Records", _dashboard_metrics(agent).get('Total Records', 'N/A'))
+    except:
+        st.metric("Total Records", "N/A")
+
 def get_confidence_color(confidence):
     """Get color based on confidence score"""
     if confidence >= 0.8:
@@ -137,6 +254,11 @@ def get_confidence_color(confidence):
         return "confidence-low"
 
 
+def _is_integer_col(s):
+    """Whether every non-missing value of a numeric column is a whole number"""
+    values = s.dropna()
+    return bool(np.isclose(values % 1, 0).all()) if len(values) > 0 else True
+
 def display_query_result(result, query, agent=None):
     """Display query result with formatting and automatic chart generation"""
     if result['success']:
@@ -159,17 +281,35 @@ def display_query_result(result, query, agent=None):
         # Display results
         if result.get('results'):
             st.subheader("📊 Results")
-            results_df = pd.DataFrame(result['results'])
+            # Column-major build with the cursor's column order
+            results_df = pd.DataFrame.from_records(result['results'], columns=result.get('columns'))
+            
+            # Only the preview rows are formatted and sent to the browser
+            preview_df = results_df.head(MAX_DISPLAY_ROWS)
             
-            # Format numeric columns with thousand separators
-            formatted_df = results_df.copy()
-            for col in formatted_df.columns:
-                if formatted_df[col].dtype in ['int64', 'float64']:
+            # Thousand separators via a Styler: columns stay numeric, so sorting and
+            # Arrow serialization keep working; integer vs decimal is decided per column
+            column_formats = {}
+            for col in preview_df.columns:
+                if preview_df[col].dtype in ['int64', 'float64']:
                     # Check if column contains large numbers that would benefit from formatting
-                    if formatted_df[col].max() > 1000:
-                        formatted_df[col] = formatted_df[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) and x == int(x) else f"{x:,.2f}" if pd.notna(x) else x)
+                    if preview_df[col].max() > 1000:
+                        column_formats[col] = "{:,.0f}" if _is_integer_col(preview_df[col]) else "{:,.2f}"
+            display_df = preview_df.style.format(column_formats, na_rep='') if column_formats else preview_df
             
-            st.dataframe(formatted_df, use_container_width=True)
+            st.dataframe(display_df, use_container_width=True, hide_index=True)
+            
+            if len(results_df) > MAX_DISPLAY_ROWS:
+                st.caption(f"Showing the first {MAX_DISPLAY_ROWS:,} of {len(results_df):,} rows")
+                # The full frame is only sent on request, unformatted and in a fixed-height grid
+                if st.checkbox("Show all rows", key="show_all_rows"):
+                    st.dataframe(results_df, use_container_width=True, hide_index=True, height=400)
+                st.download_button(
+                    "⬇️ Download full results (CSV)",
+                    results_df.to_csv(index=False).encode('utf-8'),
+                    file_name="results.csv",
+                    mime="text/csv"
+                )
             
         
         # Display metadata
@@ -193,201 +333,244 @@ def display_query_result(result, query, agent=None):
                 st.write(f"• {suggestion}")
 
 
+# Magnitude buckets (divisor, suffix), largest first
+NUMBER_BUCKETS = ((1e12, 'T'), (1e9, 'B'), (1e6, 'M'), (1e3, 'K'))
+
+# Prefix and buckets per format type ('count' stops at billions)
+NUMBER_FORMATS = {
+    'currency': ('$', NUMBER_BUCKETS),
+    'count': ('', NUMBER_BUCKETS[1:]),
+    'auto': ('', NUMBER_BUCKETS)
+}
+
+@functools.lru_cache(maxsize=4096)
+def _format_scaled(value, format_type):
+    """Format a float with its magnitude suffix (memoized; the same totals repeat across reruns)"""
+    prefix, buckets = NUMBER_FORMATS.get(format_type, NUMBER_FORMATS['auto'])
+    magnitude = abs(value)
+    for divisor, suffix in buckets:
+        if magnitude >= divisor:
+            return f"{prefix}{value/divisor:.1f}{suffix}"
+    return f"{prefix}{value:,.0f}"
+
 def format_number_streamlit(value, format_type='auto'):
     """Format numbers with thousand separators for Streamlit"""
     try:
         if pd.isna(value) or value is None:
             return "N/A"
         
-        value = float(value)
-        
-        if format_type == 'currency':
-            if abs(value) >= 1e12:
-                return f"${value/1e12:.1f}T"
-            elif abs(value) >= 1e9:
-                return f"${value/1e9:.1f}B"
-            elif abs(value) >= 1e6:
-                return f"${value/1e6:.1f}M"
-            elif abs(value) >= 1e3:
-                return f"${value/1e3:.1f}K"
-            else:
-                return f"${value:,.0f}"
-        elif format_type == 'count':
-            if abs(value) >= 1e9:
-                return f"{value/1e9:.1f}B"
-            elif abs(value) >= 1e6:
-                return f"{value/1e6:.1f}M"
-            elif abs(value) >= 1e3:
-                return f"{value/1e3:.1f}K"
-            else:
-                return f"{value:,.0f}"
-        else:  # auto
-            if abs(value) >= 1e12:
-                return f"{value/1e12:.1f}T"
-            elif abs(value) >= 1e9:
-                return f"{value/1e9:.1f}B"
-            elif abs(value) >= 1e6:
-                return f"{value/1e6:.1f}M"
-            elif abs(value) >= 1e3:
-                return f"{value/1e3:.1f}K"
-            else:
-                return f"{value:,.0f}"
+        return _format_scaled(float(value), format_type)
     except:
         return str(value)
 
+# Point/category budgets for figures; larger results are reduced before plotting
+MAX_PLOT_POINTS = 500
+MAX_BAR_CATEGORIES = 30
+
+def _downsample(df, x_col, y_col, max_points=MAX_PLOT_POINTS):
+    """
+    Reduce a line/scatter series to at most max_points rows
+    
+    Rows are sorted by x and split into max_points / 2 equal buckets; each
+    bucket keeps its minimum and maximum y, so peaks and dips survive.
+    """
+    if len(df) <= max_points:
+        return df
+    
+    data = df.assign(_y=pd.to_numeric(df[y_col], errors='coerce')).dropna(subset=['_y'])
+    data = data.sort_values(x_col, kind='stable').reset_index(drop=True)
+    n_buckets = max(max_points // 2, 1)
+    buckets = np.arange(len(data)) * n_buckets // max(len(data), 1)
+    grouped = data['_y'].groupby(buckets)
+    keep = np.union1d(grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy())
+    return data.iloc[keep].drop(columns='_y')
+
+def _top_categories(df, y_col, max_categories=MAX_BAR_CATEGORIES):
+    """Keep the largest categories of a bar chart"""
+    if len(df) <= max_categories:
+        return df
+    return df.nlargest(max_categories, y_col)
+
+# Shared bar-chart layout; uirevision keeps zoom/pan across reruns
+BAR_LAYOUT = dict(
+    xaxis_tickangle=-45,
+    margin=dict(l=20, r=20, t=40, b=80),
+    uirevision='keep'
+)
+
+def _apply_value_format(fig, is_currency=False, layout=None):
+    """
+    Apply thousand-separator y-axis ticks and hover labels in one layout update
+    
+    Args:
+        fig: Plotly figure
+        is_currency: Prefix values with '$'
+        layout: Extra layout properties to set in the same update
+        
+    Returns:
+        The same figure
+    """
+    prefix = '$' if is_currency else ''
+    fig.update_layout(layout or {}, yaxis_tickformat=f'{prefix},.0f')
+    fig.update_traces(hovertemplate=f'%{{x}}: {prefix}%{{y:,.0f}}<extra></extra>')
+    return fig
+
+@st.cache_data(ttl=300, max_entries=64, show_spinner=False)
+def _build_fig(df, query_type):
+    """
+    Build the Plotly figure for a query result (cached on the data and query type)
+    
+    Returns:
+        Plotly figure, or None if the data has no suitable columns
+    """
+    if len(df) == 0:
+        return None
+    
+    # Plotly is only imported once a chart is actually built
+    import plotly.express as px
+    
+    # One pass over the dtypes (no select_dtypes frame slices); every branch reuses these tuples
+    dtypes = df.dtypes
+    is_number = [pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in dtypes]
+    numeric_cols = tuple(dtypes.index[is_number])
+    categorical_cols = tuple(dtypes.index[(dtypes == object).to_numpy()])
+    # Lowercased names, computed once for the keyword matching below
+    lc = {col: str(col).lower() for col in df.columns}
+    
+    # Dashboard queries
+    if query_type == 'dashboard':
+        if 'metric_name' in df.columns and 'metric_value' in df.columns:
+            # Keep metrics whose value parses as a number (one vectorized pass)
+            values = pd.to_numeric(df['metric_value'], errors='coerce')
+            mask = values.notna()
+            if mask.any():
+                numeric_metrics = df.loc[mask].assign(metric_numeric=values[mask])
+                fig = px.bar(
+                    numeric_metrics,
+                    x='metric_name',
+                    y='metric_numeric',
+                    title="Dashboard Metrics"
+                )
+                return _apply_value_format(fig, layout=BAR_LAYOUT)
+    
+    # Top regions/models queries
+    elif query_type in ['top_regions', 'top_models']:
+        if len(categorical_cols) > 0 and len(numeric_cols) > 0:
+            # Find revenue or sales columns
+            revenue_cols = [col for col in numeric_cols if 'revenue' in lc[col] or 'sales' in lc[col]]
+            if revenue_cols:
+                fig = px.bar(
+                    _top_categories(df, revenue_cols[0]),
+                    x=categorical_cols[0],
+                    y=revenue_cols[0],
+                    title=f"{query_type.replace('_', ' ').title()} by {revenue_cols[0].replace('_', ' ').title()}"
+                )
+                return _apply_value_format(fig, 'revenue' in lc[revenue_cols[0]], layout=BAR_LAYOUT)
+    
+    # Annual sales queries
+    elif query_type == 'annual_sales':
+        if 'year' in df.columns:
+            year_cols = [col for col in numeric_cols if 'total' in lc[col]]
+            if year_cols:
+                fig = px.line(
+                    _downsample(df, 'year', year_cols[0]),
+                    x='year',
+                    y=year_cols[0],
+                    title="Annual Sales Trend"
+                )
+                return _apply_value_format(fig, 'revenue' in lc[year_cols[0]], layout={'uirevision': 'keep'})
+    
+    # Fuel/transmission performance
+    elif query_type in ['fuel_performance', 'transmission_performance']:
+        if len(categorical_cols) > 0 and len(numeric_cols) > 0:
+            # Create pie chart for market share
+            share_cols = [col for col in numeric_cols if 'share' in lc[col]]
+            if share_cols:
+                fig = px.pie(
+                    df,
+                    values=share_cols[0],
+                    names=categorical_cols[0],
+                    title=f"{query_type.replace('_', ' ').title()} Market Share"
+                ).update_layout(uirevision='keep')
+                return fig
+    
+    # Generic visualizations
+    else:
+        if len(numeric_cols) > 0 and len(categorical_cols) > 0:
+            # Bar chart
+            fig = px.bar(
+                _top_categories(df, numeric_cols[0]),
+                x=categorical_cols[0],
+                y=numeric_cols[0],
+                title=f"{categorical_cols[0].replace('_', ' ').title()} vs {numeric_cols[0].replace('_', ' ').title()}"
+            )
+            return _apply_value_format(fig, layout=BAR_LAYOUT)
+        
+        elif len(numeric_cols) > 1:
+            # Scatter plot
+            fig = px.scatter(
+                _downsample(df, numeric_cols[0], numeric_cols[1]),
+                x=numeric_cols[0],
+                y=numeric_cols[1],
+                render_mode='webgl',
+                title=f"{numeric_cols[0].replace('_', ' ').title()} vs {numeric_cols[1].replace('_', ' ').title()}"
+            ).update_layout(uirevision='keep', xaxis_tickformat=',.0f', yaxis_tickformat=',.0f')
+            fig.update_traces(hovertemplate='%{x:,.0f}, %{y:,.0f}<extra></extra>')
+            return fig
+    
+    return None
+
 def create_visualizations(df, query_type):
     """Create visualizations based on query type and data"""
     try:
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        categorical_cols = df.select_dtypes(include=['object']).columns
-        
         if len(df) == 0:
             st.info("No data to visualize")
             return
         
-        # Dashboard queries
-        if query_type == 'dashboard':
-            if 'metric_name' in df.columns and 'metric_value' in df.columns:
-                # Filter numeric metrics
-                numeric_metrics = df[df['metric_value'].str.isnumeric()]
-                if len(numeric_metrics) > 0:
-                    fig = px.bar(
-                        numeric_metrics,
-                        x='metric_name',
-                        y=pd.to_numeric(numeric_metrics['metric_value']),
-                        title="Dashboard Metrics"
-                    )
-                    fig.update_xaxis(tickangle=45)
-                    # Format y-axis with thousand separators
-                    fig.update_yaxis(tickformat=',.0f')
-                    # Format hover labels
-                    fig.update_traces(hovertemplate='%{x}: %{y:,.0f}<extra></extra>')
-                    st.plotly_chart(fig, use_container_width=True)
-        
-        # Top regions/models queries
-        elif query_type in ['top_regions', 'top_models']:
-            if len(categorical_cols) > 0 and len(numeric_cols) > 0:
-                # Find revenue or sales columns
-                revenue_cols = [col for col in numeric_cols if 'revenue' in col.lower() or 'sales' in col.lower()]
-                if revenue_cols:
-                    fig = px.bar(
-                        df,
-                        x=categorical_cols[0],
-                        y=revenue_cols[0],
-                        title=f"{query_type.replace('_', ' ').title()} by {revenue_cols[0].replace('_', ' ').title()}"
-                    )
-                    fig.update_xaxis(tickangle=45)
-                    # Format y-axis with thousand separators
-                    if 'revenue' in revenue_cols[0].lower():
-                        fig.update_yaxis(tickformat='$,.0f')
-                        fig.update_traces(hovertemplate='%{x}: $%{y:,.0f}<extra></extra>')
-                    else:
-                        fig.update_yaxis(tickformat=',.0f')
-                        fig.update_traces(hovertemplate='%{x}: %{y:,.0f}<extra></extra>')
-                    st.plotly_chart(fig, use_container_width=True)
-        
-        # Annual sales queries
-        elif query_type == 'annual_sales':
-            if 'year' in df.columns:
-                year_cols = [col for col in numeric_cols if 'total' in col.lower()]
-                if year_cols:
-                    fig = px.line(
-                        df,
-                        x='year',
-                        y=year_cols[0],
-                        title="Annual Sales Trend"
-                    )
-                    # Format y-axis with thousand separators
-                    if 'revenue' in year_cols[0].lower():
-                        fig.update_yaxis(tickformat='$,.0f')
-                        fig.update_traces(hovertemplate='%{x}: $%{y:,.0f}<extra></extra>')
-                    else:
-                        fig.update_yaxis(tickformat=',.0f')
-                        fig.update_traces(hovertemplate='%{x}: %{y:,.0f}<extra></extra>')
-                    st.plotly_chart(fig, use_container_width=True)
-        
-        # Fuel/transmission performance
-        elif query_type in ['fuel_performance', 'transmission_performance']:
-            if len(categorical_cols) > 0 and len(numeric_cols) > 0:
-                # Create pie chart for market share
-                share_cols = [col for col in numeric_cols if 'share' in col.lower()]
-                if share_cols:
-                    fig = px.pie(
-                        df,
-                        values=share_cols[0],
-                        names=categorical_cols[0],
-                        title=f"{query_type.replace('_', ' ').title()} Market Share"
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-        
-        # Generic visualizations
-        else:
-            if len(numeric_cols) > 0 and len(categorical_cols) > 0:
-                # Bar chart
-                fig = px.bar(
-                    df,
-                    x=categorical_cols[0],
-                    y=numeric_cols[0],
-                    title=f"{categorical_cols[0].replace('_', ' ').title()} vs {numeric_cols[0].replace('_', ' ').title()}"
-                )
-                fig.update_xaxis(tickangle=45)
-                # Format y-axis with thousand separators
-                fig.update_yaxis(tickformat=',.0f')
-                fig.update_traces(hovertemplate='%{x}: %{y:,.0f}<extra></extra>')
-                st.plotly_chart(fig, use_container_width=True)
-            
-            elif len(numeric_cols) > 1:
-                # Scatter plot
-                fig = px.scatter(
-                    df,
-                    x=numeric_cols[0],
-                    y=numeric_cols[1],
-                    title=f"{numeric_cols[0].replace('_', ' ').title()} vs {numeric_cols[1].replace('_', ' ').title()}"
-                )
-                # Format axes with thousand separators
-                fig.update_xaxis(tickformat=',.0f')
-                fig.update_yaxis(tickformat=',.0f')
-                fig.update_traces(hovertemplate='%{x:,.0f}, %{y:,.0f}<extra></extra>')
-                st.plotly_chart(fig, use_container_width=True)
+        fig = _build_fig(df, query_type)
+        if fig is not None:
+            # A stable key lets the chart be updated in place instead of rebuilt
+            st.plotly_chart(fig, use_container_width=True, key=f"viz_{query_type}")
     
     except Exception as e:
         st.warning(f"Could not create visualization: {e}")
 
+# Natural language query behind each predefined query type
+QUERY_TYPE_TEXT = {
+    'dashboard': DASHBOARD_QUERY,
+    'top_regions': 'Quais são as top 5 regiões?',
+    'top_models': 'Quais são os top 10 modelos?',
+    'annual_sales': 'Mostre as vendas anuais',
+    'regional_performance': 'Qual a performance por região?',
+    'model_performance': 'Qual a performance por modelo?',
+    'fuel_performance': 'Mostre a performance por combustível',
+    'transmission_performance': 'Mostre a performance por transmissão',
+    'annual_growth': 'Qual o crescimento anual?',
+    'year_analysis': 'Qual ano tem mais modelos vendidos?'
+}
+
 def display_available_queries(agent):
     """Display available predefined queries"""
     st.subheader("📋 Available Queries")
     
-    available_queries = agent.get_available_queries()
-    
-    # Map query types to natural language queries
-    query_mapping = {
-        'dashboard': 'Mostre o dashboard executivo',
-        'top_regions': 'Quais são as top 5 regiões?',
-        'top_models': 'Quais são os top 10 modelos?',
-        'annual_sales': 'Mostre as vendas anuais',
-        'regional_performance': 'Qual a performance por região?',
-        'model_performance': 'Qual a performance por modelo?',
-        'fuel_performance': 'Mostre a performance por combustível',
-        'transmission_performance': 'Mostre a performance por transmissão',
-        'annual_growth': 'Qual o crescimento anual?',
-        'year_analysis': 'Qual ano tem mais modelos vendidos?'
-    }
+    items = list(_cached_available_queries(agent).items())
     
-    # Create columns for better layout
+    # Create columns for better layout; each column is entered once with its half of the queries
     cols = st.columns(2)
     
-    for i, (query_type, description) in enumerate(available_queries.items()):
-        with cols[i % 2]:
-            natural_query = query_mapping.get(query_type, description)
-            if st.button(f"📊 {description}", key=f"available_{query_type}"):
-                st.session_state.selected_query = natural_query
-                st.rerun()
+    for col, col_items in zip(cols, (items[0::2], items[1::2])):
+        with col:
+            for query_type, description in col_items:
+                natural_query = QUERY_TYPE_TEXT.get(query_type, description)
+                # The callback runs the query once, before the rerun renders the page
+                st.button(f"📊 {description}", key=f"available_{query_type}",
+                          on_click=_run_selected_query, args=(agent, natural_query))
 
 def display_database_schema(agent):
     """Display database schema information"""
     st.subheader("🗄️ Database Schema")
     
-    schema = agent.get_database_schema()
+    schema = _cached_database_schema(agent)
     
     if schema:
         # Tables
@@ -395,9 +578,8 @@ def display_database_schema(agent):
             st.write("**Tables:**")
             for table_name, columns in schema['tables'].items():
                 with st.expander(f"📋 {table_name}"):
-                    if columns:
-                        df_columns = pd.DataFrame(columns)
-                        st.dataframe(df_columns, use_container_width=True)
+                    if columns is not None:
+                        st.dataframe(columns, use_container_width=True)
                     else:
                         st.info("No column information available")
         
@@ -406,9 +588,8 @@ def display_database_schema(agent):
             st.write("**Views:**")
             for schema_name, views in schema['views'].items():
                 with st.expander(f"👁️ {schema_name} schema"):
-                    if views:
-                        df_views = pd.DataFrame(views)
-                        st.dataframe(df_views, use_container_width=True)
+                    if views is not None:
+                        st.dataframe(views, use_container_width=True)
                     else:
                         st.info("No views available")
 
@@ -424,9 +605,6 @@ def main():
     if not agent:
         st.stop()
     
-    # Initialize Orchestrator Agent
-    orchestrator = initialize_orchestrator_agent()
-    
     # Sidebar
     with st.sidebar:
         st.header("🔧 Navigation")
@@ -447,43 +625,15 @@ def main():
         )
         if 'ai_provider' not in st.session_state or st.session_state.ai_provider != ai_provider:
             st.session_state.ai_provider = ai_provider
-            # Clear cache to reinitialize with new provider
-            st.cache_resource.clear()
+            # Reinitialize only the orchestrator with the new provider (keeps the pool)
+            initialize_orchestrator_agent.clear()
         
-        # Database connection status
-        st.header("🔗 Connection Status")
-        try:
-            # Test connection using agent with a known working query
-            result = agent.process_natural_language_query("Mostre o dashboard executivo")
-            if result['success']:
-                st.success("✅ Database Connected")
-            else:
-                st.error("❌ Database Disconnected")
-        except:
-            st.error("❌ Database Disconnected")
-        
-        # Quick stats
-        st.header("📊 Quick Stats")
-        try:
-            # Get basic stats using dashboard query
-            result = agent.process_natural_language_query("Mostre o dashboard executivo")
-            if result['success'] and result['results']:
-                # Find total records in dashboard results
-                for row in result['results']:
-                    if row.get('metric_name') == 'Total Records':
-                        total_records = row.get('metric_value', 'N/A')
-                        st.metric("Total Records", total_records)
-                        break
-                else:
-                    st.metric("Total Records", "N/A")
-            else:
-                st.metric("Total Records", "N/A")
-        except:
-            st.metric("Total Records", "N/A")
+        # Database connection status and quick stats (refresh on their own)
+        _sidebar_status(agent)
         
         # Available query types
         st.header("🎯 Query Types")
-        available_queries = agent.get_available_queries()
+        available_queries = _cached_available_queries(agent)
         st.write(f"**{len(available_queries)} predefined queries available**")
         
         
@@ -513,15 +663,8 @@ def main():
         
         # Get some quick stats using dashboard query
         try:
-            result = agent.process_natural_language_query("Mostre o dashboard executivo")
-            if result['success'] and result['results']:
-                # Extract metrics from dashboard results
-                metrics = {}
-                for row in result['results']:
-                    metric_name = row.get('metric_name', '')
-                    metric_value = row.get('metric_value', 'N/A')
-                    metrics[metric_name] = metric_value
-                
+            metrics = _dashboard_metrics(agent)
+            if metrics:
                 # Display key metrics
                 cols = st.columns(3)
                 with cols[0]:
@@ -548,12 +691,14 @@ def main():
         col1, col2 = st.columns([3, 1])
         
         with col1:
-            # Use text input for better UX with Enter key support
-            user_query = st.text_input(
-                "Enter your question in natural language:",
-                placeholder="e.g., Mostre o dashboard executivo, Quais são as top 5 regiões?, Qual a média de preços?",
-                key="main_query_input"
-            )
+            # A form submits once, on Enter in the text input or on the button
+            with st.form("query_form", clear_on_submit=False):
+                user_query = st.text_input(
+                    "Enter your question in natural language:",
+                    placeholder="e.g., Mostre o dashboard executivo, Quais são as top 5 regiões?, Qual a média de preços?",
+                    key="main_query_input"
+                )
+                submitted = st.form_submit_button("🚀 Execute Query", type="primary")
         
         with col2:
             st.write("**Query Options:**")
@@ -561,36 +706,17 @@ def main():
             show_explanation = st.checkbox("Show Explanation", value=True)
             show_visualization = st.checkbox("Show Visualization", value=True)
         
-        # Query buttons
-        col1, col2, col3 = st.columns([1, 1, 2])
-        
-        with col1:
-            if st.button("🚀 Execute Query", type="primary"):
-                if user_query and user_query.strip():
-                    with st.spinner("Processing your query..."):
-                        result = agent.process_natural_language_query(user_query.strip())
-                        st.session_state.last_result = result
-                        st.session_state.last_query = user_query.strip()
-                        st.rerun()
-                else:
-                    st.warning("⚠️ Please enter a query")
-        
-        # Auto-execute when Enter is pressed (if query is not empty and different from last)
-        if (user_query and user_query.strip() and 
-            user_query.strip() != st.session_state.get('last_query', '') and
-            user_query.strip() != '' and
-            'example_query' not in st.session_state):
-            with st.spinner("Processing your query..."):
-                result = agent.process_natural_language_query(user_query.strip())
-                st.session_state.last_result = result
-                st.session_state.last_query = user_query.strip()
-                st.rerun()
+        if submitted:
+            if user_query and user_query.strip():
+                with st.spinner("Processing your query..."):
+                    result = run_query(agent, user_query.strip())
+                    st.session_state.last_result = result
+                    st.session_state.last_query = user_query.strip()
+            else:
+                st.warning("⚠️ Please enter a query")
         
-        with col2:
-            if st.button("🔄 Clear"):
-                st.session_state.last_result = None
-                st.session_state.last_query = None
-                st.rerun()
+        st.button("🔄 Clear", on_click=_set_state,
+                  kwargs={'last_result': None, 'last_query': None})
         
         # Handle example query selection
         if 'example_query' in st.session_state:
@@ -603,18 +729,10 @@ def main():
             )
             col1, col2 = st.columns(2)
             with col1:
-                if st.button("✅ Use this query"):
-                    # Set the query and execute it
-                    st.session_state.last_query = st.session_state.example_query
-                    with st.spinner("Processing your query..."):
-                        result = agent.process_natural_language_query(st.session_state.example_query)
-                        st.session_state.last_result = result
-                    del st.session_state.example_query
-                    st.rerun()
+                # Callbacks run before the page renders, so no extra rerun is needed
+                st.button("✅ Use this query", on_click=_use_example_query, args=(agent,))
             with col2:
-                if st.button("❌ Cancel"):
-                    del st.session_state.example_query
-                    st.rerun()
+                st.button("❌ Cancel", on_click=_pop_state, args=('example_query',))
         
         # Display results
         if st.session_state.last_result:
@@ -624,7 +742,7 @@ def main():
         # Example queries
         st.subheader("💡 Example Queries")
         example_queries = [
-            "Mostre o dashboard executivo",
+            DASHBOARD_QUERY,
             "Quais são as top 5 regiões?",
             "Quais são os top 10 modelos?",
             "Mostre as vendas anuais",
@@ -639,9 +757,8 @@ def main():
         cols = st.columns(2)
         for i, example in enumerate(example_queries):
             with cols[i % 2]:
-                if st.button(f"📝 {example}", key=f"example_{i}"):
-                    st.session_state.example_query = example
-                    st.rerun()
+                st.button(f"📝 {example}", key=f"example_{i}",
+                          on_click=_set_state, kwargs={'example_query': example})
     
     
     elif page == "📋 Available Queries":
@@ -649,14 +766,12 @@ def main():
         
         display_available_queries(agent)
         
-        # Handle selected query
-        if 'selected_query' in st.session_state:
+        # Show the selected query's stored result (executed once by the button callback)
+        if 'selected_result' in st.session_state:
             st.markdown("---")
             st.subheader(f"Executing: {st.session_state.selected_query}")
             
-            with st.spinner("Processing query..."):
-                result = agent.process_natural_language_query(st.session_state.selected_query)
-                display_query_result(result, st.session_state.selected_query, agent)
+            display_query_result(st.session_state.selected_result, st.session_state.selected_query, agent)
     
     elif page == "🗄️ Database Schema":
         st.header("🗄️ Database Schema Information")
@@ -666,6 +781,9 @@ def main():
     elif page == "📊 AI Visualization":
         st.header("📊 AI-Powered Visualization")
         
+        # Initialize Orchestrator Agent (only this page uses it)
+        orchestrator = initialize_orchestrator_agent()
+        
         st.info("💡 **Novo!** Agora você pode criar visualizações personalizadas usando linguagem natural!")
         
         # Initialize session state for visualization
@@ -699,19 +817,17 @@ def main():
                             result = orchestrator.process_query(viz_query.strip())
                             st.session_state.viz_last_result = result
                             
-                            # Save data for later reuse
-                            if result.get('success') and result.get('data'):
-                                st.session_state.viz_last_data = pd.DataFrame(result['data'])
-                            
-                            st.rerun()
+                            # Build the frame once; the display below reuses it
+                            st.session_state.viz_last_data = (
+                                pd.DataFrame(result['data'])
+                                if result.get('success') and result.get('data') else None
+                            )
                     else:
                         st.warning("⚠️ Por favor, digite uma consulta")
             
             with col2:
-                if st.button("🔄 Limpar", key="clear_viz"):
-                    st.session_state.viz_last_result = None
-                    st.session_state.viz_last_data = None
-                    st.rerun()
+                st.button("🔄 Limpar", key="clear_viz", on_click=_set_state,
+                          kwargs={'viz_last_result': None, 'viz_last_data': None})
             
             # Display results
             if st.session_state.viz_last_result:
@@ -726,9 +842,8 @@ def main():
                         with st.expander("Ver SQL Query"):
                             st.code(result['sql_result'].get('sql_query', ''), language='sql')
                         
-                        if result.get('data'):
-                            df = pd.DataFrame(result['data'])
-                            st.dataframe(df, use_container_width=True)
+                        if st.session_state.viz_last_data is not None:
+                            st.dataframe(st.session_state.viz_last_data, use_container_width=True)
                     
                     # Display visualization
                     if 'visualization_result' in result:
@@ -738,9 +853,7 @@ def main():
                             st.subheader("📈 Visualização")
                             
                             # Display chart
-                            import base64
-                            img_data = base64.b64decode(viz_result['image_base64'])
-                            st.image(img_data, use_column_width=True)
+                            _show_png(viz_result['image_base64'])
                             
                             # Chart info
                             col1, col2, col3 = st.columns(3)
@@ -772,9 +885,9 @@ def main():
             cols = st.columns(2)
             for i, example in enumerate(example_viz_queries):
                 with cols[i % 2]:
-                    if st.button(f"📊 {example}", key=f"viz_example_{i}"):
-                        st.session_state.viz_query_example = example
-                        st.rerun()
+                    # Fills the query input above on the next render
+                    st.button(f"📊 {example}", key=f"viz_example_{i}",
+                              on_click=_set_state, kwargs={'viz_query_input': example})
         
         else:  # Visualizar Dados Existentes
             st.subheader("Criar Visualização de Dados Existentes")
@@ -788,7 +901,11 @@ def main():
                 
                 # Get visualization suggestions
                 if orchestrator:
-                    suggestions = orchestrator.suggest_visualizations(st.session_state.viz_last_data)
+                    suggestions = _cached_suggestions(
+                        _data_fingerprint(st.session_state.viz_last_data),
+                        st.session_state.viz_last_data,
+                        orchestrator
+                    )
                     
                     if suggestions:
                         st.subheader("💡 Visualizações Sugeridas")
@@ -811,9 +928,7 @@ def main():
                                             viz = viz_result['visualization_result']
                                             
                                             # Display chart
-                                            import base64
-                                            img_data = base64.b64decode(viz['image_base64'])
-                                            st.image(img_data, use_column_width=True)
+                                            _show_png(viz['image_base64'])
                                             
                                             st.success(f"✅ {viz['title']}")
                 
@@ -825,38 +940,46 @@ def main():
                     key="custom_viz_query"
                 )
                 
+                # The last chart is kept per (query, data) so reruns redisplay it without regenerating
+                viz_key = (custom_viz_query, _data_fingerprint(st.session_state.viz_last_data))
+                cached_viz = st.session_state.get('custom_viz')
+                
                 if st.button("🎨 Criar Visualização", type="primary"):
                     if custom_viz_query:
-                        with st.spinner("Criando visualização..."):
-                            viz_result = orchestrator.process_query_with_data(
-                                query=custom_viz_query,
-                                data=st.session_state.viz_last_data
-                            )
-                            
-                            if viz_result['success']:
-                                viz = viz_result['visualization_result']
-                                
-                                # Display chart
-                                import base64
-                                img_data = base64.b64decode(viz['image_base64'])
-                                st.image(img_data, use_column_width=True)
-                                
-                                # Chart info
-                                col1, col2, col3 = st.columns(3)
-                                with col1:
-                                    st.metric("Tipo de Gráfico", viz['chart_type'].title())
-                                with col2:
-                                    st.metric("Título", viz['title'])
-                                with col3:
-                                    st.metric("Tempo", f"{viz['execution_time']:.3f}s")
-                                
-                                # Show code
-                                with st.expander("📝 Ver Código Python"):
-                                    st.code(viz.get('chart_code', ''), language='python')
-                            else:
-                                st.error(f"❌ Erro: {viz_result.get('error', 'Unknown')}")
+                        # Failed attempts are retried; successful ones are reused
+                        if not cached_viz or cached_viz['key'] != viz_key or not cached_viz['result']['success']:
+                            with st.spinner("Criando visualização..."):
+                                viz_result = orchestrator.process_query_with_data(
+                                    query=custom_viz_query,
+                                    data=st.session_state.viz_last_data
+                                )
+                            cached_viz = st.session_state.custom_viz = {'key': viz_key, 'result': viz_result}
                     else:
                         st.warning("⚠️ Descreva a visualização desejada")
+                
+                if custom_viz_query and cached_viz and cached_viz['key'] == viz_key:
+                    viz_result = cached_viz['result']
+                    
+                    if viz_result['success']:
+                        viz = viz_result['visualization_result']
+                        
+                        # Display chart
+                        _show_png(viz['image_base64'])
+                        
+                        # Chart info
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.metric("Tipo de Gráfico", viz['chart_type'].title())
+                        with col2:
+                            st.metric("Título", viz['title'])
+                        with col3:
+                            st.metric("Tempo", f"{viz['execution_time']:.3f}s")
+                        
+                        # Show code
+                        with st.expander("📝 Ver Código Python"):
+                            st.code(viz.get('chart_code', ''), language='python')
+                    else:
+                        st.error(f"❌ Erro: {viz_result.get('error', 'Unknown')}")
             else:
                 st.warning("⚠️ Nenhum dado disponível. Execute uma consulta primeiro no modo 'Consulta + Visualização'.")
     
@@ -3,8 +3,8 @@
 Script para verificar dados específicos das tabelas
 """
 
+import sys
 import psycopg2
-from psycopg2.extras import RealDictCursor
 
 # Configurações de conexão
 DB_CONFIG = {
@@ -21,14 +21,15 @@ def check_data():
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         conn.set_client_encoding('UTF8')
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        # Cursor padrão: linhas como tuplas, sem um dict por linha
+        cursor = conn.cursor()
         
         print("=== DADOS DAS TABELAS ===")
         
         # Verificar bmw_sales
         print("\n--- BMW SALES ---")
         cursor.execute("SELECT COUNT(*) as total FROM bmw_sales")
-        total = cursor.fetchone()['total']
+        total = cursor.fetchone()[0]
         print(f"Total de registros: {total}")
         
         # Estatísticas por região
@@ -42,11 +43,13 @@ def check_data():
         """)
         
         regions = cursor.fetchall()
-        print("\nVendas por região:")
-        for region in regions:
-            print(f"  {region['region']}: {region['count']} registros, "
-                  f"Média vendas: {region['avg_sales']:.0f}, "
-                  f"Receita total: ${region['total_revenue']:,.2f}")
+        # Cada bloco é montado em memória e escrito de uma vez
+        lines = ["\nVendas por região:"]
+        for region, count, avg_sales, total_revenue in regions:
+            lines.append(f"  {region}: {count} registros, "
+                         f"Média vendas: {avg_sales:.0f}, "
+                         f"Receita total: ${total_revenue:,.2f}")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         # Estatísticas por modelo
         cursor.execute("""
@@ -59,18 +62,20 @@ def check_data():
         """)
         
         models = cursor.fetchall()
-        print("\nTop 5 modelos por vendas médias:")
-        for model in models:
-            print(f"  {model['model']}: {model['count']} registros, "
-                  f"Média vendas: {model['avg_sales']:.0f}")
+        lines = ["\nTop 5 modelos por vendas médias:"]
+        for model, count, avg_sales in models:
+            lines.append(f"  {model}: {count} registros, "
+                         f"Média vendas: {avg_sales:.0f}")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         # Verificar data_sources
         print("\n--- DATA SOURCES ---")
-        cursor.execute("SELECT * FROM data_sources")
+        cursor.execute("SELECT name, record_count, source_type FROM data_sources")
         sources = cursor.fetchall()
-        for source in sources:
-            print(f"  {source['name']}: {source['record_count']} registros, "
-                  f"Tipo: {source['source_type']}")
+        lines = [f"  {name}: {record_count} registros, Tipo: {source_type}"
+                 for name, record_count, source_type in sources]
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
         
         cursor.close()
         conn.close()
@@ -12,7 +12,9 @@ DB_CONFIG = {
     'port': 5433,
     'database': 'ai_data_engineering',
     'user': 'postgres',
-    'password': 'postgres123'
+    'password': 'postgres123',
+    # Falha rápida quando o servidor não responde
+    'connect_timeout': 2
 }
 
 print("🔌 Testando conexão com PostgreSQL...")
@@ -26,35 +28,24 @@ try:
     # Criar cursor
     cursor = conn.cursor()
     
-    # Teste básico
-    cursor.execute("SELECT version();")
-    version = cursor.fetchone()[0]
-    print(f"📊 PostgreSQL: {version[:50]}...")
+    # Todas as verificações em uma única consulta (um round-trip)
+    cursor.execute("""
+        SELECT version(),
+               current_database(),
+               current_user,
+               current_setting('client_encoding'),
+               current_setting('timezone'),
+               'Blumenau'::text AS cidade,
+               'Santa Catarina'::text AS estado
+    """)
+    version, db_name, user, encoding, timezone, cidade, estado = cursor.fetchone()
     
-    # Verificar database
-    cursor.execute("SELECT current_database();")
-    db_name = cursor.fetchone()[0]
+    print(f"📊 PostgreSQL: {version[:50]}...")
     print(f"🗄️ Database: {db_name}")
-    
-    # Verificar usuário
-    cursor.execute("SELECT current_user;")
-    user = cursor.fetchone()[0]
     print(f"👤 Usuário: {user}")
-    
-    # Verificar encoding
-    cursor.execute("SELECT current_setting('client_encoding');")
-    encoding = cursor.fetchone()[0]
     print(f"🔤 Encoding: {encoding}")
-    
-    # Verificar timezone
-    cursor.execute("SELECT current_setting('timezone');")
-    timezone = cursor.fetchone()[0]
     print(f"🌍 Timezone: {timezone}")
-    
-    # Teste com dados em português
-    cursor.execute("SELECT 'Blumenau' as cidade, 'Santa Catarina' as estado")
-    portuguese_data = cursor.fetchone()
-    print(f"📍 Dados em português: {portuguese_data[0]} - {portuguese_data[1]}")
+    print(f"📍 Dados em português: {cidade} - {estado}")
     
     # Fechar conexão
     cursor.close()